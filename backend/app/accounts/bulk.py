@@ -0,0 +1,125 @@
+"""
+Bulk account operations.
+
+Role changes are a single ``UPDATE ... RETURNING``. Deletion runs as a
+background job and removes each user's notifications in bounded chunks, each
+in its own short transaction, before deleting the user row. This keeps lock
+times predictable, where relying on ``ON DELETE CASCADE`` would remove every
+notification in one transaction.
+"""
+
+import logging
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.accounts.schemas import MAX_BULK_SELECTION, AccountSelection
+from app.accounts.service import apply_account_filters
+from app.core.config import settings
+from app.core.jobs import job_store
+from app.core.principal_cache import principal_cache
+from app.database import async_session
+from app.models.notification import Notification
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class SelectionTooLargeError(ValueError):
+    """Raised when a filter or ``all`` selection matches too many accounts."""
+
+
+async def resolve_selection(
+    db: AsyncSession, selection: AccountSelection, exclude_id: UUID
+) -> List[UUID]:
+    """IDs of existing accounts matched by ``selection``, never including ``exclude_id``.
+
+    Raises SelectionTooLargeError if more than ``MAX_BULK_SELECTION`` match.
+    """
+    stmt = select(User.id).where(User.id != exclude_id)
+    if selection.ids is not None:
+        stmt = stmt.where(User.id.in_(selection.ids))
+    elif selection.filters is not None:
+        stmt = apply_account_filters(stmt, selection.filters)
+    result = await db.execute(stmt.limit(MAX_BULK_SELECTION + 1))
+    user_ids = list(result.scalars().all())
+    if len(user_ids) > MAX_BULK_SELECTION:
+        raise SelectionTooLargeError(
+            f"Selection matches more than {MAX_BULK_SELECTION} accounts; narrow the filters"
+        )
+    return user_ids
+
+
+async def change_roles(
+    db: AsyncSession, selection: AccountSelection, role: str, exclude_id: UUID
+) -> List[UUID]:
+    """Set ``role`` on every selected account and return the updated IDs."""
+    stmt = update(User).where(User.id != exclude_id, User.role != role)
+    if selection.ids is not None:
+        stmt = stmt.where(User.id.in_(selection.ids))
+    else:
+        # Resolved first so the cap applies before anything is updated
+        stmt = stmt.where(User.id.in_(await resolve_selection(db, selection, exclude_id)))
+    result = await db.execute(
+        stmt.values(role=role).returning(User.id).execution_options(synchronize_session=False)
+    )
+    updated = list(result.scalars().all())
+    await db.commit()
+    await principal_cache.invalidate_many(updated)
+    return updated
+
+
+async def purge_account(user_id: UUID, chunk_size: Optional[int] = None) -> bool:
+    """Delete a user's notifications in chunks, then the user. Returns False if absent."""
+    chunk_size = chunk_size or settings.account_delete_chunk_size
+    chunk = (
+        select(Notification.id)
+        .where(Notification.user_id == user_id)
+        .limit(chunk_size)
+        .scalar_subquery()
+    )
+    async with async_session() as db:
+        while True:
+            result = await db.execute(
+                delete(Notification)
+                .where(Notification.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if result.rowcount < chunk_size:
+                break
+
+        result = await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+    await principal_cache.invalidate(user_id)
+    return result.rowcount > 0
+
+
+async def create_delete_job(user_ids: List[UUID], admin_id: UUID) -> str:
+    return await job_store.create(
+        "account_delete",
+        owner_id=str(admin_id),
+        total=len(user_ids),
+        processed=0,
+        deleted=0,
+        failed=0,
+    )
+
+
+async def run_bulk_delete(job_id: str, user_ids: List[UUID]) -> None:
+    """Purge each account in turn, recording progress in the job store."""
+    await job_store.update(job_id, status="running")
+    deleted = failed = 0
+    for processed, user_id in enumerate(user_ids, start=1):
+        try:
+            if await purge_account(user_id):
+                deleted += 1
+        except Exception as e:
+            failed += 1
+            logger.error(f"Failed to delete account {user_id} in job {job_id}: {e}")
+        await job_store.update(job_id, processed=processed, deleted=deleted, failed=failed)
+    status = "failed" if failed and not deleted else "completed"
+    await job_store.update(job_id, status=status)
+    logger.info(f"Account deletion {job_id} {status}: {deleted} deleted, {failed} failed")
@@ -0,0 +1,282 @@
+"""
+Bulk account import.
+
+An uploaded CSV or JSON file is parsed up front, then processed as a
+background job:
+
+1. every row is validated with ``AccountCreateRequest`` and checked for
+   emails and phone numbers repeated within the file;
+2. one query finds rows whose email or phone number already exists;
+3. rows are processed in chunks: passwords are hashed in parallel on a
+   dedicated process pool, the chunk is written with a single multi-row
+   ``INSERT ... ON CONFLICT DO NOTHING RETURNING``, and welcome emails are
+   queued in batches.
+
+Progress is kept in the job store and the per-row outcome is saved as a
+downloadable CSV when the job finishes.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+from typing import Any, Dict, List
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import String, any_, bindparam, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.accounts.schemas import AccountCreateRequest
+from app.core.config import settings
+from app.core.hashing import PasswordHasher
+from app.core.jobs import job_store
+from app.database import async_session
+from app.models.user import User
+from app.tasks.email import send_new_account_emails
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = ("name", "surname", "email", "phone_number", "password", "role")
+RESULT_FIELDS = ("row", "email", "status", "error")
+
+# Kept apart from the request-path hasher so an import cannot starve logins.
+# Imports wait for a free slot rather than fail when several run at once.
+import_hasher = PasswordHasher(
+    executor="process",
+    max_workers=settings.account_import_hash_workers,
+    max_pending=settings.account_import_chunk_size,
+    wait_when_full=True,
+)
+
+
+class ImportFileError(ValueError):
+    """The uploaded file could not be read as a list of accounts."""
+
+
+def parse_import_file(filename: str, content: bytes) -> List[Dict[str, Any]]:
+    """Read a CSV (with a header row) or JSON array upload into raw row dicts."""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFileError("File must be UTF-8 encoded")
+
+    if filename.lower().endswith(".json"):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ImportFileError(f"Invalid JSON: {e}")
+        if isinstance(data, dict):
+            data = data.get("accounts")
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ImportFileError("JSON must be an array of account objects")
+        rows = data
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"name", "email", "phone_number", "password"} - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFileError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+        rows = list(reader)
+
+    if not rows:
+        raise ImportFileError("File contains no accounts")
+    if len(rows) > settings.account_import_max_rows:
+        raise ImportFileError(
+            f"File contains {len(rows)} accounts; the limit is {settings.account_import_max_rows}"
+        )
+    return [_clean_row(row) for row in rows]
+
+
+def _clean_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    cleaned = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is not None:
+            cleaned[field] = value
+    return cleaned
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def _validate_rows(
+    rows: List[Dict[str, Any]], results: List[Dict[str, Any]]
+) -> List[tuple[int, AccountCreateRequest]]:
+    """Validate rows and drop in-file duplicates; failures go into ``results``."""
+    valid = []
+    seen_emails: set[str] = set()
+    seen_phones: set[str] = set()
+    for index, row in enumerate(rows):
+        result = results[index]
+        try:
+            account = AccountCreateRequest(**row)
+        except ValidationError as e:
+            result.update(status="failed", error=_validation_message(e))
+            continue
+        result["email"] = account.email
+        if account.email in seen_emails:
+            result.update(status="failed", error="Duplicate email in file")
+            continue
+        if account.phone_number in seen_phones:
+            result.update(status="failed", error="Duplicate phone number in file")
+            continue
+        seen_emails.add(account.email)
+        seen_phones.add(account.phone_number)
+        valid.append((index, account))
+    return valid
+
+
+async def _existing_contacts(
+    accounts: List[AccountCreateRequest],
+) -> tuple[set[str], set[str]]:
+    """Emails and phone numbers among ``accounts`` that are already taken."""
+    emails = [account.email for account in accounts]
+    phones = [account.phone_number for account in accounts]
+    stmt = select(User.email, User.phone_number).where(
+        or_(
+            User.email == any_(bindparam("emails", emails, type_=ARRAY(String))),
+            User.phone_number == any_(bindparam("phones", phones, type_=ARRAY(String))),
+        )
+    )
+    async with async_session() as db:
+        result = await db.execute(stmt)
+        rows = result.all()
+    return {row.email for row in rows}, {row.phone_number for row in rows}
+
+
+def _filter_existing(
+    valid: List[tuple[int, AccountCreateRequest]],
+    taken_emails: set[str],
+    taken_phones: set[str],
+    results: List[Dict[str, Any]],
+) -> List[tuple[int, AccountCreateRequest]]:
+    remaining = []
+    for index, account in valid:
+        if account.email in taken_emails:
+            results[index].update(status="failed", error="Email already in use")
+        elif account.phone_number in taken_phones:
+            results[index].update(status="failed", error="Phone number already in use")
+        else:
+            remaining.append((index, account))
+    return remaining
+
+
+async def _insert_chunk(
+    chunk: List[tuple[int, AccountCreateRequest]], results: List[Dict[str, Any]]
+) -> List[AccountCreateRequest]:
+    """Hash and insert one chunk; return the accounts that were created."""
+    hashes = await asyncio.gather(
+        *(import_hasher.hash(account.password) for _, account in chunk)
+    )
+    values = [
+        {
+            "id": uuid4(),
+            "name": account.name,
+            "surname": account.surname,
+            "email": account.email,
+            "phone_number": account.phone_number,
+            "password_hash": password_hash,
+            "role": account.role,
+            "extra_data": {},
+        }
+        for (_, account), password_hash in zip(chunk, hashes)
+    ]
+    # Rows created concurrently since the duplicate check are skipped, not fatal
+    stmt = insert(User).values(values).on_conflict_do_nothing().returning(User.email)
+    async with async_session() as db:
+        result = await db.execute(stmt)
+        inserted = set(result.scalars().all())
+        await db.commit()
+
+    created = []
+    for index, account in chunk:
+        if account.email in inserted:
+            results[index]["status"] = "created"
+            created.append(account)
+        else:
+            results[index].update(status="failed", error="Email or phone number already in use")
+    return created
+
+
+def _queue_welcome_emails(accounts: List[AccountCreateRequest]) -> None:
+    login_url = f"{settings.frontend_url}/login"
+    batch_size = max(settings.account_import_email_batch_size, 1)
+    for start in range(0, len(accounts), batch_size):
+        batch = [
+            {
+                "to_email": account.email,
+                "user_name": account.name,
+                "password": account.password,
+                "role": account.role,
+            }
+            for account in accounts[start : start + batch_size]
+        ]
+        send_new_account_emails.delay(batch, login_url)
+
+
+def _results_csv(results: List[Dict[str, Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(results)
+    return buffer.getvalue()
+
+
+async def run_import(job_id: str, rows: List[Dict[str, Any]], send_emails: bool) -> None:
+    """Process an import job to completion, recording progress in the job store."""
+    results = [
+        {"row": index + 1, "email": row.get("email"), "status": "pending", "error": None}
+        for index, row in enumerate(rows)
+    ]
+    created_count = 0
+    try:
+        await job_store.update(job_id, status="running")
+        valid = _validate_rows(rows, results)
+        if valid:
+            taken_emails, taken_phones = await _existing_contacts([a for _, a in valid])
+            valid = _filter_existing(valid, taken_emails, taken_phones, results)
+        await job_store.update(job_id, processed=len(rows) - len(valid))
+
+        chunk_size = max(settings.account_import_chunk_size, 1)
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start : start + chunk_size]
+            created = await _insert_chunk(chunk, results)
+            created_count += len(created)
+            if send_emails and created:
+                _queue_welcome_emails(created)
+            await job_store.increment(job_id, processed=len(chunk))
+            await job_store.update(job_id, created=created_count)
+
+        status = "completed"
+    except Exception as e:
+        logger.error(f"Account import {job_id} failed: {e}")
+        for result in results:
+            if result["status"] == "pending":
+                result.update(status="failed", error="Import aborted")
+        status = "failed"
+
+    failed = sum(1 for result in results if result["status"] == "failed")
+    await job_store.set_result(job_id, _results_csv(results))
+    await job_store.update(
+        job_id, status=status, processed=len(rows), created=created_count, failed=failed
+    )
+    logger.info(f"Account import {job_id} {status}: {created_count} created, {failed} failed")
+
+
+async def create_import_job(rows: List[Dict[str, Any]], admin_id: UUID) -> str:
+    """Register an import job and return its ID; the caller schedules ``run_import``."""
+    return await job_store.create(
+        "account_import",
+        owner_id=str(admin_id),
+        total=len(rows),
+        processed=0,
+        created=0,
+        failed=0,
+    )
@@ -1,33 +1,277 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import or_, select
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.accounts.schemas import AccountCreateRequest, AccountResponse
+from app.accounts.bulk import (
+    SelectionTooLargeError,
+    change_roles,
+    create_delete_job,
+    purge_account,
+    resolve_selection,
+    run_bulk_delete,
+)
+from app.accounts.importer import (
+    ImportFileError,
+    create_import_job,
+    parse_import_file,
+    run_import,
+)
+from app.accounts.schemas import (
+    AccountCreateRequest,
+    AccountDeleteJob,
+    AccountFilters,
+    AccountImportJob,
+    AccountPage,
+    AccountResponse,
+    AccountRoleChangeRequest,
+    AccountRoleChangeResponse,
+    AccountSelection,
+)
+from app.accounts.service import apply_account_filters
 from app.core.config import settings
-from app.core.dependencies import get_admin_user, get_db
-from app.core.security import hash_password
+from app.core.dependencies import Principal, get_admin_user, get_db, get_read_db
+from app.core.hashing import password_hasher
+from app.core.jobs import job_store
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+)
+from app.core.read_routing import read_router
+from app.core.writes import DuplicateError, commit_unique
 from app.models.user import User
 from app.tasks.email import send_new_account_email
 
 router = APIRouter()
 
+EXPORT_COLUMNS = (
+    User.id,
+    User.name,
+    User.surname,
+    User.email,
+    User.phone_number,
+    User.role,
+    User.avatar_url,
+    User.created_at,
+    User.updated_at,
+)
+EXPORT_BATCH_SIZE = 1000
 
-@router.get("/", response_model=list[AccountResponse])
+
+def account_filters(
+    role: Optional[Literal["ADMIN", "STAFF", "USER"]] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=255),
+) -> AccountFilters:
+    return AccountFilters(role=role, created_from=created_from, created_to=created_to, q=q)
+
+
+@router.get("/", response_model=AccountPage)
 async def list_accounts(
-    admin: User = Depends(get_admin_user),
+    filters: AccountFilters = Depends(account_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    admin: Principal = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = apply_account_filters(select(User), filters)
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(
+            tuple_(User.created_at, User.id)
+            < tuple_(literal(created_at, User.created_at.type), literal(last_id, User.id.type))
+        )
+    stmt = stmt.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    users = result.scalars().all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+    return AccountPage(items=users, next_cursor=next_cursor)
+
+
+async def _export_rows(
+    user_id: UUID, filters: AccountFilters, export_format: str
+) -> AsyncIterator[str]:
+    """Stream matching accounts through a server-side cursor, one batch at a time.
+
+    The session is opened here rather than taken from a dependency so that it
+    lives exactly as long as the response body.
+    """
+    stmt = (
+        apply_account_filters(select(*EXPORT_COLUMNS), filters)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    names = [column.key for column in EXPORT_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == "csv":
+        writer.writerow(names)
+
+    session = await read_router.open_session(user_id)
+    try:
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            for row in rows:
+                values = [
+                    value.isoformat() if isinstance(value, datetime) else value
+                    for value in row
+                ]
+                if export_format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(names, values)), default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        await session.close()
+
+
+@router.get("/export")
+async def export_accounts(
+    format: Literal["csv", "ndjson"] = "csv",
+    filters: AccountFilters = Depends(account_filters),
+    admin: Principal = Depends(get_admin_user),
+):
+    """Download every matching account as CSV or newline-delimited JSON."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(admin.id, filters, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="accounts-{stamp}.{format}"'},
+    )
+
+
+@router.post(
+    "/import", response_model=AccountImportJob, status_code=status.HTTP_202_ACCEPTED
+)
+async def import_accounts(
+    file: UploadFile,
+    background_tasks: BackgroundTasks,
+    send_emails: bool = True,
+    admin: Principal = Depends(get_admin_user),
+):
+    """Start a bulk import from a CSV (with header row) or JSON array upload."""
+    content = await file.read(settings.account_import_max_bytes + 1)
+    if len(content) > settings.account_import_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Import file is too large",
+        )
+    try:
+        rows = parse_import_file(file.filename or "", content)
+    except ImportFileError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    job_id = await create_import_job(rows, admin.id)
+    background_tasks.add_task(run_import, job_id, rows, send_emails)
+    return await job_store.get(job_id)
+
+
+async def _get_import_job(job_id: str) -> dict:
+    job = await job_store.get(job_id)
+    if job is None or job.get("kind") != "account_import":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
+
+@router.get("/import/{job_id}", response_model=AccountImportJob)
+async def get_import_job(job_id: str, admin: Principal = Depends(get_admin_user)):
+    """Progress and totals for an import job."""
+    return await _get_import_job(job_id)
+
+
+@router.get("/import/{job_id}/result")
+async def get_import_result(job_id: str, admin: Principal = Depends(get_admin_user)):
+    """Per-row outcome of a finished import as CSV."""
+    await _get_import_job(job_id)
+    content = await job_store.get_result(job_id)
+    if content is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Import is still running")
+    return Response(
+        content,
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="import-{job_id}.csv"'},
+    )
+
+
+@router.post("/bulk/role", response_model=AccountRoleChangeResponse)
+async def bulk_change_role(
+    payload: AccountRoleChangeRequest,
+    admin: Principal = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(User).order_by(User.created_at.desc()))
-    return result.scalars().all()
+    """Set the role of every selected account except the caller's own."""
+    try:
+        updated = await change_roles(db, payload, payload.role, exclude_id=admin.id)
+    except SelectionTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return AccountRoleChangeResponse(updated=len(updated), ids=updated)
+
+
+@router.post(
+    "/bulk/delete", response_model=AccountDeleteJob, status_code=status.HTTP_202_ACCEPTED
+)
+async def bulk_delete(
+    payload: AccountSelection,
+    background_tasks: BackgroundTasks,
+    admin: Principal = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Delete the selected accounts (never the caller's own) in a background job."""
+    try:
+        user_ids = await resolve_selection(db, payload, exclude_id=admin.id)
+    except SelectionTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    job_id = await create_delete_job(user_ids, admin.id)
+    background_tasks.add_task(run_bulk_delete, job_id, user_ids)
+    return await job_store.get(job_id)
+
+
+@router.get("/bulk/delete/{job_id}", response_model=AccountDeleteJob)
+async def get_delete_job(job_id: str, admin: Principal = Depends(get_admin_user)):
+    """Progress of a bulk deletion job."""
+    job = await job_store.get(job_id)
+    if job is None or job.get("kind") != "account_delete":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delete job not found")
+    return job
 
 
 @router.get("/{account_id}", response_model=AccountResponse)
 async def get_account(
     account_id: UUID,
-    admin: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    admin: Principal = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     result = await db.execute(select(User).where(User.id == account_id))
     user = result.scalar_one_or_none()
@@ -39,31 +283,25 @@ async def get_account(
 @router.post("/", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
 async def create_account(
     payload: AccountCreateRequest,
-    admin: User = Depends(get_admin_user),
+    admin: Principal = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(User).where(
-            or_(User.email == payload.email, User.phone_number == payload.phone_number)
-        )
-    )
-    if result.scalar_one_or_none() is not None:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Email or phone number already in use",
-        )
-
     user = User(
         name=payload.name,
         surname=payload.surname,
         email=payload.email,
         phone_number=payload.phone_number,
-        password_hash=hash_password(payload.password),
+        password_hash=await password_hasher.hash(payload.password),
         role=payload.role,
     )
     db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email or phone number already in use",
+        )
 
     login_url = f"{settings.frontend_url}/login"
     send_new_account_email.delay(
@@ -76,17 +314,13 @@ async def create_account(
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
     account_id: UUID,
-    admin: User = Depends(get_admin_user),
-    db: AsyncSession = Depends(get_db),
+    admin: Principal = Depends(get_admin_user),
 ):
     if account_id == admin.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete your own account",
         )
-    result = await db.execute(select(User).where(User.id == account_id))
-    user = result.scalar_one_or_none()
-    if user is None:
+    # Notifications go in bounded chunks rather than one cascading delete
+    if not await purge_account(account_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-    await db.delete(user)
-    await db.commit()
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 class AccountResponse(BaseModel):
@@ -20,6 +20,20 @@ class AccountResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class AccountPage(BaseModel):
+    items: list[AccountResponse]
+    next_cursor: Optional[str] = None
+
+
+class AccountFilters(BaseModel):
+    """Query filters shared by the accounts listing and export."""
+
+    role: Optional[Literal["ADMIN", "STAFF", "USER"]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    q: Optional[str] = None  # name or email prefix
+
+
 class AccountCreateRequest(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     surname: Optional[str] = None
@@ -27,3 +41,60 @@ class AccountCreateRequest(BaseModel):
     phone_number: str = Field(..., min_length=5, max_length=50)
     password: str = Field(..., min_length=6)
     role: Literal["ADMIN", "STAFF", "USER"] = "USER"
+
+
+class AccountImportJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "completed", "failed"]
+    total: int
+    processed: int
+    created: int
+    failed: int
+    has_result: bool = False
+
+
+MAX_BULK_SELECTION = 10000
+
+
+class AccountSelection(BaseModel):
+    """Accounts targeted by a bulk operation: explicit IDs, a listing filter or ``all``.
+
+    A filter must set at least one field; selecting every account takes an
+    explicit ``"all": true``. Filter and ``all`` selections are capped at
+    ``MAX_BULK_SELECTION`` matches, like ``ids``.
+    """
+
+    ids: Optional[list[UUID]] = Field(None, min_length=1, max_length=MAX_BULK_SELECTION)
+    filters: Optional[AccountFilters] = None
+    all: bool = False
+
+    @model_validator(mode="after")
+    def check_one_target(self) -> "AccountSelection":
+        targets = (self.ids is not None) + (self.filters is not None) + self.all
+        if targets != 1:
+            raise ValueError("Provide exactly one of ids, filters or all")
+        if self.filters is not None and not any(
+            value not in (None, "") for value in self.filters.model_dump().values()
+        ):
+            raise ValueError(
+                'filters must set at least one field; use "all": true for every account'
+            )
+        return self
+
+
+class AccountRoleChangeRequest(AccountSelection):
+    role: Literal["ADMIN", "STAFF", "USER"]
+
+
+class AccountRoleChangeResponse(BaseModel):
+    updated: int
+    ids: list[UUID]
+
+
+class AccountDeleteJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "completed", "failed"]
+    total: int
+    processed: int
+    deleted: int
+    failed: int
@@ -0,0 +1,25 @@
+from sqlalchemy import Select, func, or_
+
+from app.accounts.schemas import AccountFilters
+from app.core.pagination import escape_like
+from app.models.user import User
+
+
+def apply_account_filters(stmt: Select, filters: AccountFilters) -> Select:
+    """Narrow a users query by role, creation date range and name/email prefix."""
+    if filters.role is not None:
+        stmt = stmt.where(User.role == filters.role)
+    if filters.created_from is not None:
+        stmt = stmt.where(User.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(User.created_at < filters.created_to)
+    if filters.q:
+        # Matches the lower(...) text_pattern_ops indexes
+        prefix = f"{escape_like(filters.q.lower())}%"
+        stmt = stmt.where(
+            or_(
+                func.lower(User.email).like(prefix, escape="\\"),
+                func.lower(User.name).like(prefix, escape="\\"),
+            )
+        )
+    return stmt
@@ -4,6 +4,7 @@ from app.accounts.router import router as accounts_router
 from app.auth.router import router as auth_router
 from app.notifications.router import router as notifications_router
 from app.search.router import router as search_router
+from app.system.router import router as system_router
 from app.users.router import router as users_router
 
 api_router = APIRouter()
@@ -12,3 +13,4 @@ api_router.include_router(users_router, prefix="/users", tags=["Users"])
 api_router.include_router(accounts_router, prefix="/accounts", tags=["Accounts"])
 api_router.include_router(notifications_router, prefix="/notifications", tags=["Notifications"])
 api_router.include_router(search_router, prefix="/search", tags=["Search"])
+api_router.include_router(system_router, prefix="/system", tags=["System"])
@@ -0,0 +1,167 @@
+"""
+Google ID token verification against a locally cached JWKS.
+
+Google's signing keys are fetched once, kept in memory for as long as the
+certs endpoint's Cache-Control allows, and refreshed by a background task
+shortly before they expire. Verifying a credential is then a local signature
+and claims check with no network I/O on the request path.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+from app.core.config import settings
+from app.core.http import ProviderUnavailableError, outbound_http
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+DEFAULT_KEYS_TTL_SECONDS = 3600
+# Refresh this long before the cached keys expire
+REFRESH_MARGIN_SECONDS = 300
+RETRY_DELAY_SECONDS = 30
+# Minimum spacing between forced refetches triggered by an unknown key id
+UNKNOWN_KID_REFETCH_SECONDS = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _cache_ttl(headers: httpx.Headers) -> int:
+    """Seconds the response may be cached for, honouring Cache-Control and Age."""
+    match = _MAX_AGE_RE.search(headers.get("cache-control", ""))
+    if not match:
+        return DEFAULT_KEYS_TTL_SECONDS
+    try:
+        age = int(headers.get("age", "0"))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens with signing keys cached in memory."""
+
+    def __init__(self, certs_url: str, client_id: str):
+        self.certs_url = certs_url
+        self.client_id = client_id
+        self._keys: Dict[str, Key] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _fetch_keys(self) -> None:
+        response = await outbound_http.get("google", self.certs_url)
+        response.raise_for_status()
+        keys = {}
+        for key_data in response.json().get("keys", []):
+            kid = key_data.get("kid")
+            if kid:
+                algorithm = key_data.get("alg", "RS256")
+                keys[kid] = jwk.construct(key_data, algorithm=algorithm)
+        ttl = _cache_ttl(response.headers)
+        now = time.monotonic()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + ttl
+        logger.info(f"Loaded {len(keys)} Google signing key(s), cached for {ttl}s")
+
+    async def _get_key(self, kid: str) -> Key:
+        now = time.monotonic()
+        if kid in self._keys and now < self._expires_at:
+            return self._keys[kid]
+
+        async with self._lock:
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            refetch_unknown = (
+                kid not in self._keys
+                and now - self._fetched_at > UNKNOWN_KID_REFETCH_SECONDS
+            )
+            # Another waiter may have refreshed while we queued for the lock
+            if expired or refetch_unknown:
+                try:
+                    await self._fetch_keys()
+                except (ProviderUnavailableError, httpx.HTTPStatusError) as e:
+                    logger.error(f"Failed to fetch Google signing keys: {e}")
+                    if not self._keys:
+                        raise ProviderUnavailableError("Unable to fetch Google signing keys")
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise ValueError("Unknown Google signing key")
+        return key
+
+    async def verify(self, credential: str) -> Dict[str, Any]:
+        """Verify a Google ID token and return its claims.
+
+        Raises ValueError if the token is malformed, badly signed, expired,
+        issued for another client, or not issued by Google.
+        """
+        try:
+            header = jwt.get_unverified_header(credential)
+        except JWTError as e:
+            raise ValueError(f"Malformed token: {e}")
+        kid = header.get("kid")
+        if not kid:
+            raise ValueError("Token header has no key id")
+
+        key = await self._get_key(kid)
+        try:
+            claims = jwt.decode(
+                credential,
+                key,
+                algorithms=["RS256"],
+                audience=self.client_id,
+                options={"verify_at_hash": False},
+            )
+        except JWTError as e:
+            raise ValueError(str(e))
+
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer")
+        return claims
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self._fetch_keys()
+                delay = max(
+                    self._expires_at - time.monotonic() - REFRESH_MARGIN_SECONDS,
+                    RETRY_DELAY_SECONDS,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background Google key refresh failed: {e}")
+                delay = RETRY_DELAY_SECONDS
+            await asyncio.sleep(delay)
+
+    async def start(self) -> None:
+        """Start refreshing keys in the background (no-op without a client ID)."""
+        if self.client_id and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the background refresh."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+# Singleton instance
+google_verifier = GoogleTokenVerifier(
+    certs_url=settings.google_certs_url,
+    client_id=settings.google_client_id,
+)
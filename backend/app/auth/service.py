@@ -1,24 +1,34 @@
+import asyncio
+import hashlib
 import re
+from functools import partial
 from typing import Optional
 
-import httpx
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token as google_id_token
-from sqlalchemy import or_, select
+from cachetools import TTLCache
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.google import google_verifier
 from app.auth.schemas import RegisterRequest, TokenResponse
 from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.http import outbound_http
+from app.core.principal_cache import principal_cache
 from app.core.security import (
     create_access_token,
     create_reset_token,
     decode_reset_token,
-    hash_password,
-    verify_password,
 )
+from app.core.writes import DuplicateError, commit_unique, unique_writes
+from app.models.identity import UserIdentity
 from app.models.user import User
 from app.tasks.email import send_reset_password_email
 
+# Validated Facebook profiles keyed by token hash, so retries skip the Graph API
+_facebook_profile_cache: TTLCache = TTLCache(
+    maxsize=4096, ttl=max(settings.social_token_cache_ttl_seconds, 1)
+)
+
 
 def is_email(identifier: str) -> bool:
     return re.match(r"[^@]+@[^@]+\.[^@]+", identifier) is not None
@@ -33,50 +43,40 @@ async def authenticate_user(
         stmt = select(User).where(User.phone_number == identifier)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
-    if user is None or not verify_password(password, user.password_hash):
+    if user is None or not await password_hasher.verify(password, user.password_hash):
         return None
     return user
 
 
 async def register_user(db: AsyncSession, data: RegisterRequest) -> User:
-    result = await db.execute(
-        select(User).where(
-            or_(User.email == data.email, User.phone_number == data.phone_number)
-        )
-    )
-    if result.scalar_one_or_none():
-        raise ValueError("Email or phone number already registered")
-
     user = User(
         name=data.name,
         surname=data.surname,
         email=data.email,
         phone_number=data.phone_number,
-        password_hash=hash_password(data.password),
+        password_hash=await password_hasher.hash(data.password),
         role=data.role,
     )
     db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise ValueError("Email or phone number already registered")
     return user
 
 
 def create_user_token(user: User) -> TokenResponse:
-    token = create_access_token(data={"sub": str(user.id)})
+    token = create_access_token(data={"sub": str(user.id), "role": user.role})
     return TokenResponse(access_token=token)
 
 
-def verify_google_token(credential: str) -> dict:
+async def verify_google_token(credential: str) -> dict:
     """Verify a Google ID token and return its payload.
 
     Raises ValueError if the token is invalid or cannot be verified.
     """
     try:
-        id_info = google_id_token.verify_oauth2_token(
-            credential,
-            google_requests.Request(),
-            settings.google_client_id,
-        )
+        id_info = await google_verifier.verify(credential)
     except ValueError as e:
         raise ValueError(f"Invalid Google token: {e}")
     return id_info
@@ -85,51 +85,121 @@ def verify_google_token(credential: str) -> dict:
 async def verify_facebook_token(access_token: str) -> dict:
     """Verify a Facebook access token and return the user's profile dict.
 
+    The token check and the profile fetch are issued concurrently over the
+    shared client; validated results are cached briefly by token hash. While
+    the Facebook breaker is recovering it admits one trial call at a time, so
+    the two calls are then made one after the other.
+
     Raises ValueError if the token is invalid or the app ID does not match.
     """
+    cache_key = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    cached = _facebook_profile_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     app_token = f"{settings.facebook_app_id}|{settings.facebook_app_secret}"
-    async with httpx.AsyncClient() as client:
-        debug_resp = await client.get(
-            "https://graph.facebook.com/debug_token",
-            params={"input_token": access_token, "access_token": app_token},
+    debug_call = partial(
+        outbound_http.get,
+        "facebook",
+        "https://graph.facebook.com/debug_token",
+        params={"input_token": access_token, "access_token": app_token},
+    )
+    profile_call = partial(
+        outbound_http.get,
+        "facebook",
+        "https://graph.facebook.com/me",
+        params={
+            "fields": "id,name,first_name,last_name,email,picture.type(large)",
+            "access_token": access_token,
+        },
+    )
+    if outbound_http.is_closed("facebook"):
+        debug_resp, profile_resp = await asyncio.gather(debug_call(), profile_call())
+    else:
+        # The first call is the breaker's trial; a success closes it for the second
+        debug_resp = await debug_call()
+        profile_resp = await profile_call()
+    debug_resp.raise_for_status()
+    debug_data = debug_resp.json().get("data", {})
+    if not debug_data.get("is_valid"):
+        raise ValueError("Invalid Facebook access token")
+    if debug_data.get("app_id") != settings.facebook_app_id:
+        raise ValueError("Facebook token app ID mismatch")
+
+    if profile_resp.is_error:
+        raise ValueError("Invalid Facebook access token")
+    profile = profile_resp.json()
+    if settings.social_token_cache_ttl_seconds > 0:
+        _facebook_profile_cache[cache_key] = profile
+    return profile
+
+
+async def get_user_by_identity(
+    db: AsyncSession, provider: str, provider_user_id: str
+) -> Optional[User]:
+    """Return the user linked to a social identity via the unique identity index."""
+    result = await db.execute(
+        select(User)
+        .join(UserIdentity, UserIdentity.user_id == User.id)
+        .where(
+            UserIdentity.provider == provider,
+            UserIdentity.provider_user_id == provider_user_id,
         )
-        debug_resp.raise_for_status()
-        debug_data = debug_resp.json().get("data", {})
-        if not debug_data.get("is_valid"):
-            raise ValueError("Invalid Facebook access token")
-        if debug_data.get("app_id") != settings.facebook_app_id:
-            raise ValueError("Facebook token app ID mismatch")
-
-        profile_resp = await client.get(
-            "https://graph.facebook.com/me",
-            params={
-                "fields": "id,name,first_name,last_name,email,picture.type(large)",
-                "access_token": access_token,
-            },
+    )
+    return result.scalar_one_or_none()
+
+
+async def link_identity(
+    db: AsyncSession, user: User, provider: str, provider_user_id: str
+) -> None:
+    """Link a social identity to ``user``, replacing any previous one for the provider.
+
+    Also mirrors ``<provider>_id`` into ``extra_data``, which clients read to
+    show connected accounts. The caller commits.
+    """
+    await db.execute(
+        delete(UserIdentity).where(
+            UserIdentity.user_id == user.id, UserIdentity.provider == provider
+        )
+    )
+    db.add(
+        UserIdentity(
+            user_id=user.id, provider=provider, provider_user_id=provider_user_id
         )
-        profile_resp.raise_for_status()
-        return profile_resp.json()
+    )
+    extra = dict(user.extra_data or {})
+    extra[f"{provider}_id"] = provider_user_id
+    user.extra_data = extra
+
+
+async def unlink_identity(db: AsyncSession, user: User, provider: str) -> None:
+    """Remove ``user``'s identity for ``provider``. The caller commits."""
+    await db.execute(
+        delete(UserIdentity).where(
+            UserIdentity.user_id == user.id, UserIdentity.provider == provider
+        )
+    )
+    extra = dict(user.extra_data or {})
+    extra.pop(f"{provider}_id", None)
+    user.extra_data = extra
 
 
 async def _find_social_user(
     db: AsyncSession,
     *,
-    social_field: str,
+    provider: str,
     social_id: str,
     email: str,
 ) -> User:
     """Find an existing user by social provider ID or email. Never creates accounts.
 
     Lookup order:
-    1. Match by social_field stored in extra_data (fast path for already-linked accounts).
+    1. Match by linked identity (fast path for already-linked accounts).
     2. Fall back to email match — auto-links the social ID for future logins.
     3. Raise ValueError if no matching account exists.
     """
-    # 1. Try by social ID stored in extra_data
-    result = await db.execute(
-        select(User).where(User.extra_data[social_field].as_string() == social_id)
-    )
-    user = result.scalar_one_or_none()
+    # 1. Try by linked identity
+    user = await get_user_by_identity(db, provider, social_id)
     if user is not None:
         return user
 
@@ -142,11 +212,12 @@ async def _find_social_user(
         )
 
     # Auto-link: store the social ID so future logins skip the email lookup
-    extra = dict(user.extra_data or {})
-    extra[social_field] = social_id
-    user.extra_data = extra
-    await db.commit()
-    await db.refresh(user)
+    await link_identity(db, user, provider, social_id)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise ValueError("This social account is already linked to another user.")
+    await principal_cache.invalidate(user.id)
     return user
 
 
@@ -157,13 +228,12 @@ async def _create_social_user(
     name: str,
     surname: Optional[str],
     avatar_url: Optional[str],
-    google_id: Optional[str] = None,
-    facebook_id: Optional[str] = None,
+    provider: str,
+    social_id: str,
 ) -> User:
-    """Create a new user account for a social login.
+    """Create a new user account for a social login and link the social ID.
 
-    The account is created with an unusable password and the social ID must be linked
-    separately after creation.
+    The account is created with an unusable password.
     """
     user = User(
         name=name,
@@ -172,14 +242,16 @@ async def _create_social_user(
         phone_number=None,
         avatar_url=avatar_url,
         password_hash="",
-        extra_data={
-            "facebook_id": facebook_id,
-            "google_id": google_id,
-        },
+        extra_data={},
     )
     db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    try:
+        async with unique_writes(db):
+            await db.flush()
+            await link_identity(db, user, provider, social_id)
+            await db.commit()
+    except DuplicateError:
+        raise ValueError("An account with this email or social login already exists.")
     return user
 
 
@@ -190,26 +262,33 @@ async def _find_or_create_social_user(
     name: str,
     surname: Optional[str],
     avatar_url: Optional[str],
+    provider: str,
+    social_id: str,
 ) -> User:
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
     if user is None:
-        user = User(
+        return await _create_social_user(
+            db,
+            email=email,
             name=name,
             surname=surname,
-            email=email,
-            phone_number=None,
             avatar_url=avatar_url,
-            password_hash="",
+            provider=provider,
+            social_id=social_id,
         )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
+
+    await link_identity(db, user, provider, social_id)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise ValueError("This social account is already linked to another user.")
+    await principal_cache.invalidate(user.id)
     return user
 
 
 async def google_auth_user(db: AsyncSession, credential: str, is_signup: bool = False) -> User:
-    id_info = verify_google_token(credential)
+    id_info = await verify_google_token(credential)
 
     email = id_info.get("email")
     if not email:
@@ -221,12 +300,11 @@ async def google_auth_user(db: AsyncSession, credential: str, is_signup: bool =
     
     if not is_signup:
         return await _find_social_user(
-            db, social_field="google_id", social_id=google_id, email=email
+            db, provider="google", social_id=google_id, email=email
         )
     
     # Ensure this Google ID is not already linked to a different account
-    result = await db.execute(select(User).where(User.extra_data["google_id"].as_string() == google_id))
-    existing: Optional[User] = result.scalar_one_or_none()
+    existing = await get_user_by_identity(db, "google", google_id)
     if existing:
         raise ValueError("This Google account is already linked to another user.")
     
@@ -236,7 +314,8 @@ async def google_auth_user(db: AsyncSession, credential: str, is_signup: bool =
         name=id_info.get("given_name") or id_info.get("name", "Unknown"),
         surname=id_info.get("family_name"),
         avatar_url=id_info.get("picture"),
-        google_id=google_id,
+        provider="google",
+        social_id=google_id,
     )
 
 
@@ -253,12 +332,11 @@ async def facebook_auth_user(db: AsyncSession, access_token: str, is_signup: boo
 
     if not is_signup:
         return await _find_social_user(
-            db, social_field="facebook_id", social_id=facebook_id, email=email
+            db, provider="facebook", social_id=facebook_id, email=email
         )
     
     # Ensure this Facebook ID is not already linked to a different account
-    result = await db.execute(select(User).where(User.extra_data["facebook_id"].as_string() == facebook_id))
-    existing: Optional[User] = result.scalar_one_or_none()
+    existing = await get_user_by_identity(db, "facebook", facebook_id)
     if existing:
         raise ValueError("This Facebook account is already linked to another user.")
     
@@ -268,7 +346,8 @@ async def facebook_auth_user(db: AsyncSession, access_token: str, is_signup: boo
         name=profile.get("first_name") or profile.get("name", "Unknown"),
         surname=profile.get("last_name", None),
         avatar_url=profile.get("picture", {}).get("data", {}).get("url") or profile.get("picture"),
-        facebook_id=facebook_id,
+        provider="facebook",
+        social_id=facebook_id,
     )
 
 
@@ -306,5 +385,6 @@ async def reset_password(db: AsyncSession, token: str, new_password: str) -> Non
     if user is None:
         raise ValueError("Invalid or expired reset token")
 
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await password_hasher.hash(new_password)
     await db.commit()
+    await principal_cache.invalidate(user.id)
@@ -18,7 +18,17 @@ celery_app.conf.update(
     task_acks_late=True,
     worker_prefetch_multiplier=1,
     broker_connection_retry_on_startup=True,
-    include=["app.tasks.email"],
+    include=["app.tasks.email", "app.tasks.notifications"],
+    beat_schedule={
+        "reconcile-notification-counts": {
+            "task": "tasks.reconcile_notification_counts",
+            "schedule": settings.notification_reconcile_interval_seconds,
+        },
+        "maintain-notification-partitions": {
+            "task": "tasks.maintain_notification_partitions",
+            "schedule": settings.notification_partition_maintenance_interval_seconds,
+        },
+    },
 )
 
 # Module-level alias so `celery -A app.celery worker` finds the app
@@ -0,0 +1,146 @@
+"""
+Connection pool instrumentation for the async engines.
+
+``InstrumentedQueuePool`` times every connection acquisition (including time
+spent waiting for a free slot) and counts pool timeouts. ``pool_monitor``
+keeps per-engine counters plus a rolling series of gauge samples
+(checked out, idle, overflow) taken on a fixed interval.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Counters and sampled gauges for one engine's pool."""
+
+    def __init__(self, name: str, pool: AsyncAdaptedQueuePool, history: int):
+        self.name = name
+        self.pool = pool
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self._interval_max_wait_ms = 0.0
+        self.series: Deque[Dict[str, Any]] = deque(maxlen=history)
+
+    def record_acquire(self, wait_ms: float) -> None:
+        self.acquisitions += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self._interval_max_wait_ms = max(self._interval_max_wait_ms, wait_ms)
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+
+    def gauges(self) -> Dict[str, int]:
+        pool = self.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # overflow() counts down from -pool_size until the pool is full
+            "overflow": max(pool.overflow(), 0),
+        }
+
+    def sample(self) -> None:
+        self.series.append(
+            {
+                "timestamp": time.time(),
+                **self.gauges(),
+                "max_wait_ms": round(self._interval_max_wait_ms, 2),
+            }
+        )
+        self._interval_max_wait_ms = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.gauges(),
+            "acquisitions": self.acquisitions,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": (
+                round(self.total_wait_ms / self.acquisitions, 2) if self.acquisitions else 0.0
+            ),
+            "max_wait_ms": round(self.max_wait_ms, 2),
+            "series": list(self.series),
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports acquisition wait times to its ``PoolMetrics``."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_acquire((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class PoolMonitor:
+    """Tracks pool metrics for every registered engine and samples them periodically."""
+
+    def __init__(self):
+        self._metrics: Dict[str, PoolMetrics] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._interval = 10.0
+
+    def register(self, name: str, engine: AsyncEngine, history: int = 360) -> PoolMetrics:
+        pool = engine.sync_engine.pool
+        metrics = PoolMetrics(name, pool, history)
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.metrics = metrics
+        self._metrics[name] = metrics
+        return metrics
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: metrics.snapshot() for name, metrics in self._metrics.items()}
+
+    async def _sample_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            for metrics in self._metrics.values():
+                metrics.sample()
+                logger.debug(f"DB pool {metrics.name}: {metrics.gauges()}")
+
+    async def start(self, interval: float) -> None:
+        """Start sampling pool gauges every ``interval`` seconds (0 disables)."""
+        if interval > 0 and self._task is None:
+            self._interval = interval
+            self._task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+pool_monitor = PoolMonitor()
@@ -1,8 +1,15 @@
+from dataclasses import dataclass
+from typing import Callable, FrozenSet
+from uuid import UUID
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.constants import ROLE_PERMISSIONS
+from app.core.principal_cache import principal_cache
+from app.core.read_routing import read_router
 from app.core.security import decode_access_token
 from app.database import async_session
 from app.models.user import User
@@ -10,17 +17,29 @@ from app.models.user import User
 security_scheme = HTTPBearer()
 
 
+@dataclass(frozen=True)
+class Principal:
+    """The caller's identity as carried in the access token claims.
+
+    Role and permissions are fixed when the token is issued, so a role change
+    takes effect for claims-only endpoints when the user's token is renewed.
+    """
+
+    id: UUID
+    role: str
+    permissions: FrozenSet[str]
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+
 async def get_db():
     async with async_session() as session:
         yield session
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    token = credentials.credentials
-    payload = decode_access_token(token)
+def _decode_token(credentials: HTTPAuthorizationCredentials) -> tuple[UUID, dict]:
+    payload = decode_access_token(credentials.credentials)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
@@ -30,21 +49,88 @@ async def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
         )
+    try:
+        return UUID(user_id), payload
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
+        )
+
+
+async def _load_user(db: AsyncSession, user_id: UUID) -> User:
+    user = principal_cache.get(user_id)
+    if user is not None:
+        # Attach the cached copy so handlers can modify and commit it as usual
+        db.add(user)
+        return user
+
+    generation = principal_cache.generation
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
+    principal_cache.set(user, generation)
     return user
 
 
-async def get_admin_user(
-    current_user: User = Depends(get_current_user),
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
-    if current_user.role != "ADMIN":
+    user_id, _ = _decode_token(credentials)
+    return await _load_user(db, user_id)
+
+
+async def get_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """Authorize from token claims alone, without loading the user row.
+
+    Tokens issued before role claims existed fall back to a user lookup.
+    """
+    user_id, payload = _decode_token(credentials)
+    role = payload.get("role")
+    if role is None:
+        user = await _load_user(db, user_id)
+        role = user.role
+        permissions = ROLE_PERMISSIONS.get(role, [])
+    else:
+        permissions = payload.get("perms", ROLE_PERMISSIONS.get(role, []))
+    return Principal(id=user_id, role=role, permissions=frozenset(permissions))
+
+
+async def get_read_db(principal: Principal = Depends(get_principal)):
+    """Session for read-only endpoints: the replica unless the caller wrote recently."""
+    session = await read_router.open_session(principal.id)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def require(permission: str) -> Callable[..., Principal]:
+    """Build a dependency that rejects callers lacking ``permission``."""
+
+    async def dependency(principal: Principal = Depends(get_principal)) -> Principal:
+        if not principal.has_permission(permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Missing permission: {permission}",
+            )
+        return principal
+
+    return dependency
+
+
+async def get_admin_user(
+    principal: Principal = Depends(get_principal),
+) -> Principal:
+    if principal.role != "ADMIN":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
         )
-    return current_user
+    return principal
@@ -0,0 +1,169 @@
+"""
+Async password hashing backed by a bounded worker pool.
+
+bcrypt is deliberately slow (~200ms per call), so running it inline in an
+async handler stalls every other request and WebSocket on the process. All
+hashing and verification goes through ``password_hasher``, which hands the
+work to a thread or process pool and rejects calls once too many are waiting.
+Batch callers can ask for a hasher that waits for a free slot instead.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class HasherOverloadedError(RuntimeError):
+    """Raised when the hashing queue is full and a call is rejected."""
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Run ``fn`` in the worker and return its result with the run time in ms."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+class _OperationStats:
+    """Latency samples for one hasher operation (hash or verify)."""
+
+    def __init__(self, window: int = 1024):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_wait_ms = 0.0
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, wait_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.total_wait_ms += wait_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self._samples.append(elapsed_ms)
+
+    def _percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "avg_wait_ms": round(self.total_wait_ms / self.calls, 2) if self.calls else 0.0,
+            "p50_ms": round(self._percentile(0.50), 2),
+            "p95_ms": round(self._percentile(0.95), 2),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop with admission control and latency stats.
+
+    When ``max_pending`` calls are in flight, further calls are rejected with
+    ``HasherOverloadedError``, or with ``wait_when_full`` they wait their turn.
+    """
+
+    def __init__(
+        self, executor: str, max_workers: int, max_pending: int, wait_when_full: bool = False
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor}")
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.wait_when_full = wait_when_full
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._stats = {"hash": _OperationStats(), "verify": _OperationStats()}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.wait_when_full:
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.max_pending)
+            self._waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            try:
+                return await self._execute(operation, fn, *args)
+            finally:
+                self._slots.release()
+
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            logger.warning(
+                f"Password hashing queue full ({self._pending} pending), rejecting {operation}"
+            )
+            raise HasherOverloadedError("Password hashing is temporarily overloaded")
+        return await self._execute(operation, fn, *args)
+
+    async def _execute(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_ms = await loop.run_in_executor(
+                self._get_executor(), _timed, fn, *args
+            )
+        finally:
+            self._pending -= 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stats[operation].record(elapsed_ms, max(0.0, elapsed_ms - run_ms))
+        logger.debug(f"Password {operation} took {elapsed_ms:.1f}ms (ran {run_ms:.1f}ms)")
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run("verify", verify_password, plain, hashed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "waiting": self._waiting,
+            "rejected": self._rejected,
+            "hash": self._stats["hash"].snapshot(),
+            "verify": self._stats["verify"].snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    executor=settings.password_hash_executor,
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
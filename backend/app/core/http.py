@@ -0,0 +1,152 @@
+"""
+Shared outbound HTTP client for third-party providers.
+
+One keep-alive ``httpx.AsyncClient`` lives for the lifetime of the app, so
+calls to Google and Facebook reuse pooled TCP/TLS connections. Each provider
+has its own timeout and circuit breaker: after repeated transport errors or
+5xx responses the breaker opens and calls fail fast with
+``ProviderUnavailableError`` until a trial call succeeds again.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when a provider is failing or its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open after a cool-down."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        if self.state == "closed":
+            return
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                raise ProviderUnavailableError(f"{self.name} is temporarily unavailable")
+            self.state = "half_open"
+            self._trial_in_flight = False
+        # Half-open: let a single trial call through
+        if self._trial_in_flight:
+            raise ProviderUnavailableError(f"{self.name} is temporarily unavailable")
+        self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = "closed"
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self._failures} failure(s)"
+                )
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Forget an in-flight trial call that ended without an outcome."""
+        self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+class OutboundHTTP:
+    """App-lifetime pooled HTTP client with per-provider timeouts and breakers."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._timeouts: Dict[str, float] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def register(self, provider: str, timeout: float) -> None:
+        self._timeouts[provider] = timeout
+        self._breakers[provider] = CircuitBreaker(
+            provider,
+            failure_threshold=settings.circuit_breaker_failure_threshold,
+            reset_seconds=settings.circuit_breaker_reset_seconds,
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry_seconds,
+                ),
+            )
+        return self._client
+
+    async def get(self, provider: str, url: str, **kwargs: Any) -> httpx.Response:
+        """GET ``url`` on behalf of ``provider``.
+
+        Raises ProviderUnavailableError on transport errors, 5xx responses or
+        an open breaker. 4xx responses are returned to the caller untouched.
+        """
+        breaker = self._breakers[provider]
+        breaker.before_call()
+        try:
+            response = await self._get_client().get(
+                url, timeout=self._timeouts[provider], **kwargs
+            )
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            logger.error(f"Request to {provider} failed: {e!r}")
+            raise ProviderUnavailableError(f"{provider} is temporarily unavailable")
+        except BaseException:
+            breaker.release()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+            logger.error(f"{provider} responded with {response.status_code}")
+            raise ProviderUnavailableError(f"{provider} is temporarily unavailable")
+        breaker.record_success()
+        return response
+
+    def is_closed(self, provider: str) -> bool:
+        """Whether ``provider``'s breaker is closed, i.e. calls are not being trialled."""
+        return self._breakers[provider].state == "closed"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            provider: {"timeout_seconds": self._timeouts[provider], **breaker.snapshot()}
+            for provider, breaker in self._breakers.items()
+        }
+
+    async def start(self) -> None:
+        self._get_client()
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Singleton instance
+outbound_http = OutboundHTTP()
+outbound_http.register("google", timeout=settings.google_timeout_seconds)
+outbound_http.register("facebook", timeout=settings.facebook_timeout_seconds)
@@ -0,0 +1,74 @@
+"""
+Redis-backed status records for long-running background jobs.
+
+Each job is a Redis hash (``jobs:<id>``) holding JSON-encoded fields such as
+``status``, ``total`` and ``processed``, so any API instance can report
+progress for a job started on another. A job may also store one downloadable
+result document. Everything expires after ``job_ttl_seconds``.
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+JOB_KEY_PREFIX = "jobs:"
+
+
+class JobStore:
+    """Creates, updates and reads job status records."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    async def create(self, kind: str, **fields: Any) -> str:
+        job_id = uuid4().hex
+        await self.update(
+            job_id,
+            id=job_id,
+            kind=kind,
+            status="pending",
+            created_at=time.time(),
+            **fields,
+        )
+        return job_id
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        key = self._key(job_id)
+        mapping = {name: json.dumps(value, default=str) for name, value in fields.items()}
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def increment(self, job_id: str, **counts: int) -> None:
+        """Atomically add to integer fields (e.g. ``processed=500``)."""
+        key = self._key(job_id)
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for name, amount in counts.items():
+                pipe.hincrby(key, name, amount)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await get_redis().hgetall(self._key(job_id))
+        if not raw:
+            return None
+        return {name: json.loads(value) for name, value in raw.items()}
+
+    async def set_result(self, job_id: str, content: str) -> None:
+        await get_redis().set(f"{self._key(job_id)}:result", content, ex=self.ttl_seconds)
+        await self.update(job_id, has_result=True)
+
+    async def get_result(self, job_id: str) -> Optional[str]:
+        return await get_redis().get(f"{self._key(job_id)}:result")
+
+
+# Singleton instance
+job_store = JobStore(ttl_seconds=settings.job_ttl_seconds)
@@ -0,0 +1,40 @@
+"""
+Keyset pagination helpers.
+
+Listings are ordered newest first on ``(created_at, id)``. The cursor handed
+to the client is an opaque, URL-safe encoding of the last row's sort key; the
+next page continues strictly after it, so pages stay stable while rows are
+inserted and every page costs one index range scan regardless of depth.
+"""
+
+import base64
+from datetime import datetime
+from uuid import UUID
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Parse a cursor from ``encode_cursor``. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Escape LIKE wildcards so ``value`` matches literally."""
+    return (
+        value.replace(escape, escape * 2)
+        .replace("%", f"{escape}%")
+        .replace("_", f"{escape}_")
+    )
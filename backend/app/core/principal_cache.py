@@ -0,0 +1,153 @@
+"""
+In-process cache of authenticated users.
+
+``get_current_user`` runs on nearly every request, so the loaded ``User`` row
+is cached here (TTL + LRU, bounded) keyed by user id. Any code path that
+changes a user calls ``principal_cache.invalidate`` after committing; the
+eviction is broadcast over Redis pub/sub so every API instance drops its copy.
+"""
+
+import asyncio
+import copy
+import logging
+from typing import Any, Dict, Iterable, Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "users:invalidate"
+
+
+class PrincipalCache:
+    """TTL + LRU cache of user column snapshots with cross-instance invalidation."""
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.enabled = max_size > 0 and ttl_seconds > 0
+        self._cache: TTLCache = TTLCache(maxsize=max(max_size, 1), ttl=max(ttl_seconds, 1))
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+        # Bumped on every invalidation so loads that raced an update are not stored
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: UUID) -> Optional[User]:
+        """Return a fresh detached ``User`` built from the cached snapshot, if any."""
+        if not self.enabled:
+            return None
+        snapshot = self._cache.get(user_id)
+        if snapshot is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        user = User(**copy.deepcopy(snapshot))
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, user: User, generation: int) -> None:
+        """Cache ``user`` unless an invalidation happened since ``generation``."""
+        if not self.enabled or generation != self._generation:
+            return
+        self._cache[user.id] = {key: getattr(user, key) for key in self._columns}
+
+    def evict(self, user_id: UUID) -> None:
+        """Drop a user from this instance's cache only."""
+        self._generation += 1
+        self._cache.pop(user_id, None)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Drop a user locally and tell every other instance to do the same."""
+        self.evict(user_id)
+        if not self.enabled:
+            return
+        try:
+            await get_redis().publish(INVALIDATION_CHANNEL, str(user_id))
+        except Exception as e:
+            logger.error(f"Failed to publish principal invalidation for {user_id}: {e}")
+
+    async def invalidate_many(self, user_ids: Iterable[UUID]) -> None:
+        """``invalidate`` for several users, published in one pipeline."""
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            self.evict(user_id)
+        if not self.enabled or not user_ids:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.publish(INVALIDATION_CHANNEL, str(user_id))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to publish principal invalidations: {e}")
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._cache),
+            "max_size": self._cache.maxsize,
+            "ttl_seconds": self._cache.ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were not subscribed is lost
+                self.clear()
+                logger.info(f"Subscribed to Redis channel: {INVALIDATION_CHANNEL}")
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self.evict(UUID(message["data"]))
+                    except ValueError:
+                        logger.warning(f"Ignoring malformed invalidation: {message['data']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Principal invalidation listener error: {e}")
+                self.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start_invalidation_listener(self) -> None:
+        """Start listening for invalidations published by other instances."""
+        if self.enabled and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop_invalidation_listener(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+
+# Singleton instance
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_max_size,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
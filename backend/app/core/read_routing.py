@@ -0,0 +1,115 @@
+"""
+Read-replica routing with a read-your-writes window.
+
+Read-only endpoints take their session from ``get_read_db``, which uses the
+replica unless the caller wrote recently. After any successful mutating
+request, ``ReadYourWritesMiddleware`` pins the caller to the primary for
+``read_your_writes_seconds``. The pin is kept locally and in Redis so every
+instance honours it. If the replica cannot be reached, reads fall back to the
+primary and the replica is skipped for a short cool-down.
+"""
+
+import logging
+import time
+from typing import Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import decode_access_token
+from app.database import async_read_session, async_session
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+PIN_KEY_PREFIX = "db:pin:"
+REPLICA_RETRY_SECONDS = 30
+
+
+class ReadRouter:
+    """Chooses the session factory for read-only work."""
+
+    def __init__(self, pin_seconds: int):
+        self.pin_seconds = pin_seconds
+        self._local_pins: TTLCache = TTLCache(maxsize=100_000, ttl=max(pin_seconds, 1))
+        self._replica_down_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return async_read_session is not async_session
+
+    async def pin(self, user_id: UUID) -> None:
+        """Route ``user_id``'s reads to the primary for the read-your-writes window."""
+        if self.pin_seconds <= 0:
+            return
+        self._local_pins[user_id] = True
+        try:
+            await get_redis().set(f"{PIN_KEY_PREFIX}{user_id}", 1, ex=self.pin_seconds)
+        except Exception as e:
+            logger.error(f"Failed to record primary pin for user {user_id}: {e}")
+
+    async def is_pinned(self, user_id: UUID) -> bool:
+        if self.pin_seconds <= 0:
+            return False
+        if user_id in self._local_pins:
+            return True
+        try:
+            return bool(await get_redis().exists(f"{PIN_KEY_PREFIX}{user_id}"))
+        except Exception as e:
+            # Without Redis we cannot tell, so stay safe and read from the primary
+            logger.error(f"Failed to check primary pin for user {user_id}: {e}")
+            return True
+
+    def replica_failed(self) -> None:
+        self._replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+
+    async def session_factory(self, user_id: Optional[UUID]) -> async_sessionmaker:
+        """Return the replica session factory unless the primary must be used."""
+        if not self.enabled or time.monotonic() < self._replica_down_until:
+            return async_session
+        if user_id is not None and await self.is_pinned(user_id):
+            return async_session
+        return async_read_session
+
+    async def open_session(self, user_id: Optional[UUID]) -> AsyncSession:
+        """Open a read session, falling back to the primary if the replica is down."""
+        factory = await self.session_factory(user_id)
+        session = factory()
+        if factory is async_session:
+            return session
+        try:
+            await session.connection()
+        except Exception as e:
+            logger.error(f"Read replica unavailable, using primary: {e}")
+            await session.close()
+            self.replica_failed()
+            session = async_session()
+        return session
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Pins the caller to the primary after a successful mutating request."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            payload = decode_access_token(token)
+            if payload and payload.get("sub"):
+                try:
+                    await read_router.pin(UUID(payload["sub"]))
+                except ValueError:
+                    pass
+        return response
+
+
+# Singleton instance
+read_router = ReadRouter(pin_seconds=settings.read_your_writes_seconds)
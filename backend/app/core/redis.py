@@ -0,0 +1,30 @@
+"""
+Shared Redis client for request-path commands.
+
+The client owns a connection pool, so callers should reuse it instead of
+opening a new connection per command. It is closed in the app lifespan.
+"""
+
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.redis_url, decode_responses=True)
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -5,6 +5,7 @@ import bcrypt
 from jose import JWTError, jwt
 
 from app.core.config import settings
+from app.core.constants import ROLE_PERMISSIONS
 
 
 def hash_password(password: str) -> str:
@@ -18,7 +19,10 @@ def verify_password(plain: str, hashed: str) -> bool:
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """Create an access token. A ``role`` claim also embeds its permission set."""
     to_encode = data.copy()
+    if "role" in to_encode and "perms" not in to_encode:
+        to_encode["perms"] = ROLE_PERMISSIONS.get(to_encode["role"], [])
     expire = datetime.now(timezone.utc) + (
         expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
     )
@@ -0,0 +1,175 @@
+"""
+Slow statement log with automatic EXPLAIN capture.
+
+Statements slower than ``slow_query_threshold_ms`` are recorded into a bounded
+ring buffer with their normalized SQL, redacted parameters and duration. The
+first time a statement shape turns up (and again once per
+``slow_query_explain_interval_seconds``), a background task runs
+``EXPLAIN (FORMAT JSON)`` for it on a separate connection and attaches the plan
+to the entry. EXPLAIN without ANALYZE only plans the statement, so writes are
+never repeated.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from cachetools import TTLCache
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.sql_metrics import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+MAX_CONCURRENT_EXPLAINS = 2
+SKIP_OPTION = "slow_query_log"
+
+
+def redact_value(value: Any) -> Any:
+    """Keep only the type (and length, for strings and bytes) of a parameter."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_value(value) for value in parameters]
+    return redact_value(parameters)
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements for the engines it is attached to."""
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        max_entries: int,
+        explain: bool,
+        explain_interval_seconds: int,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max(max_entries, 1))
+        self._engines: Dict[Any, tuple[str, AsyncEngine]] = {}
+        self._recently_explained: TTLCache = TTLCache(
+            maxsize=1000, ttl=max(explain_interval_seconds, 1)
+        )
+        self._explain_tasks: Set[asyncio.Task] = set()
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def attach(self, name: str, engine: AsyncEngine) -> None:
+        if not self.enabled:
+            return
+        self._engines[engine.sync_engine] = (name, engine)
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # On the execution context, so a statement that raises leaves nothing behind
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_slow_query_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        if not context.execution_options.get(SKIP_OPTION, True):
+            return
+
+        name, engine = self._engines.get(conn.engine, ("unknown", None))
+        shape = normalize_sql(statement)
+        entry = {
+            "timestamp": time.time(),
+            "engine": name,
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": shape,
+            "parameters": redact_parameters(
+                parameters[0] if executemany and parameters else parameters
+            ),
+            "executemany": executemany,
+            "plan": None,
+        }
+        self._entries.append(entry)
+        self.recorded += 1
+        logger.warning(f"Slow statement on {name} ({elapsed_ms:.1f} ms): {shape[:200]}")
+
+        if self.explain and engine is not None and not executemany:
+            self._schedule_explain(engine, entry, statement, parameters)
+
+    def _schedule_explain(
+        self, engine: AsyncEngine, entry: Dict[str, Any], statement: str, parameters: Any
+    ) -> None:
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return
+        if entry["statement"] in self._recently_explained:
+            return
+        if len(self._explain_tasks) >= MAX_CONCURRENT_EXPLAINS:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._recently_explained[entry["statement"]] = True
+        task = loop.create_task(self._explain(engine, entry, statement, parameters))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(
+        self, engine: AsyncEngine, entry: Dict[str, Any], statement: str, parameters: Any
+    ) -> None:
+        try:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(**{SKIP_OPTION: False})
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+                await conn.rollback()
+            entry["plan"] = plan
+        except Exception as e:
+            logger.error(f"Failed to EXPLAIN slow statement: {e}")
+            entry["plan_error"] = str(e)
+
+    def entries(self, limit: Optional[int] = None) -> list[Dict[str, Any]]:
+        """Recorded statements, newest first."""
+        entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._recently_explained.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "recorded": self.recorded,
+            "buffered": len(self._entries),
+            "capacity": self._entries.maxlen,
+        }
+
+
+# Singleton instance
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    max_entries=settings.slow_query_buffer_size,
+    explain=settings.slow_query_explain,
+    explain_interval_seconds=settings.slow_query_explain_interval_seconds,
+)
@@ -0,0 +1,148 @@
+"""
+Per-request SQL instrumentation.
+
+Engine event hooks time every statement and attribute it to the current
+request through a context variable. ``SQLInstrumentationMiddleware`` opens
+that context, then reports the statement count, total DB time and slowest
+statement in a ``Server-Timing`` header and a single log line. It warns when
+a request goes over the query budget or runs the same statement shape many
+times (a likely N+1 loop).
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A bind placeholder, optionally cast as asyncpg compiles them (``$1::UUID``)
+_PLACEHOLDER = r"(?:\$\d+|%\(\w+\)s|\?)(?:::\w+(?:\[\])?)?"
+_IN_LIST_RE = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape: literals and parameters become ``?``.
+
+    >>> normalize_sql("SELECT * FROM users WHERE id IN ($1::UUID, $2::UUID)")
+    'SELECT * FROM users WHERE id IN (?...)'
+    """
+    shape = _STRING_RE.sub("?", statement)
+    shape = _IN_LIST_RE.sub("(?...)", shape)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class RequestSQLStats:
+    """Statements issued while handling one request."""
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+        self.shapes[normalize_sql(statement)] += 1
+
+
+_request_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+# The start time lives on the execution context, which is discarded with the
+# statement, so a statement that raises leaves nothing behind on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_sql_metrics_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attach the timing hooks to ``engine``."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLInstrumentationMiddleware(BaseHTTPMiddleware):
+    """Reports per-request SQL counts and timings."""
+
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestSQLStats()
+        token = _request_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _request_stats.reset(token)
+
+        if stats.count == 0:
+            return response
+
+        response.headers.append(
+            "Server-Timing",
+            f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+            f"db-slowest;dur={stats.slowest_ms:.1f}",
+        )
+        shape, repeats = stats.shapes.most_common(1)[0]
+        logger.info(
+            f"sql method={request.method} path={request.url.path} "
+            f"status={response.status_code} queries={stats.count} "
+            f"db_ms={stats.total_ms:.1f} slowest_ms={stats.slowest_ms:.1f} "
+            f"max_repeats={repeats}"
+        )
+        _warn_if_excessive(request, stats, shape, repeats)
+        return response
+
+
+def _warn_if_excessive(
+    request: Request, stats: RequestSQLStats, shape: str, repeats: int
+) -> None:
+    budget = settings.sql_query_budget
+    if budget > 0 and stats.count > budget:
+        logger.warning(
+            f"{request.method} {request.url.path} issued {stats.count} statements "
+            f"(budget {budget})"
+        )
+    threshold = settings.sql_repeat_threshold
+    if threshold > 0 and repeats >= threshold:
+        logger.warning(
+            f"{request.method} {request.url.path} ran the same statement {repeats} times, "
+            f"possible N+1: {shape[:200]}"
+        )
+
+
+def current_request_stats() -> Optional[RequestSQLStats]:
+    """Stats for the request being handled, if instrumentation is active."""
+    return _request_stats.get()
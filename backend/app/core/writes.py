@@ -0,0 +1,57 @@
+"""
+Write helpers that lean on database constraints instead of pre-check SELECTs.
+
+Uniqueness (email, phone number, social identity) is enforced by unique
+indexes, so writers just insert or update and commit. A unique violation
+surfaces as ``DuplicateError`` carrying the violated index name, which the
+caller maps to its usual 400/409 response. Server-generated columns come back
+through ``RETURNING`` (models use ``eager_defaults``), so no post-commit
+``refresh`` is needed.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+UNIQUE_VIOLATION = "23505"
+
+
+class DuplicateError(Exception):
+    """A write violated a unique constraint."""
+
+    def __init__(self, constraint: Optional[str]):
+        super().__init__(f"Unique constraint violated: {constraint}")
+        self.constraint = constraint
+
+
+def unique_violation_constraint(exc: IntegrityError) -> Optional[str]:
+    """Return the violated constraint name, or None if ``exc`` is not a unique violation."""
+    orig = exc.orig
+    if getattr(orig, "sqlstate", None) != UNIQUE_VIOLATION:
+        return None
+    # asyncpg's exception (chained as the cause) carries the index name
+    return getattr(orig.__cause__, "constraint_name", None) or ""
+
+
+@asynccontextmanager
+async def unique_writes(db: AsyncSession) -> AsyncIterator[None]:
+    """Turn a unique violation raised inside the block into ``DuplicateError``.
+
+    The session is rolled back before the error is raised.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        await db.rollback()
+        constraint = unique_violation_constraint(e)
+        if constraint is None:
+            raise
+        raise DuplicateError(constraint) from e
+
+
+async def commit_unique(db: AsyncSession) -> None:
+    """Commit, turning a unique violation into ``DuplicateError``."""
+    async with unique_writes(db):
+        await db.commit()
@@ -1,10 +1,79 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, pool_monitor
+from app.core.slow_queries import slow_query_log
 
 ASYNC_DATABASE_URL = settings.database_url.replace(
     "postgresql://", "postgresql+asyncpg://", 1
 )
+ASYNC_REPLICA_URL = settings.database_replica_url.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+)
+
+
+def connect_args() -> dict:
+    if not settings.db_pgbouncer_mode:
+        return {}
+    # PgBouncer in transaction mode hands each transaction a different server
+    # connection, so prepared statements must not be cached and their names
+    # must be unique.
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
 
-engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+def engine_options() -> dict:
+    """Pool and driver options shared by every application engine."""
+    return {
+        "echo": False,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args(),
+    }
+
+
+def create_worker_engine() -> AsyncEngine:
+    """Engine for Celery tasks.
+
+    Tasks run their coroutine with ``asyncio.run``, a new event loop each time,
+    and asyncpg connections cannot move between loops. So nothing is pooled;
+    dispose of the engine when the task finishes.
+    """
+    return create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=NullPool, connect_args=connect_args()
+    )
+
+
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options())
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+pool_monitor.register("primary", engine)
+slow_query_log.attach("primary", engine)
+
+# Read-only endpoints use the replica when one is configured; otherwise reads
+# share the primary engine.
+if ASYNC_REPLICA_URL:
+    replica_engine = create_async_engine(ASYNC_REPLICA_URL, **engine_options())
+    async_read_session = async_sessionmaker(
+        replica_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    pool_monitor.register("replica", replica_engine)
+    slow_query_log.attach("replica", replica_engine)
+else:
+    replica_engine = None
+    async_read_session = async_session
@@ -2,22 +2,46 @@ import os
 
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from app.accounts.importer import import_hasher
 from app.api.router import api_router
+from app.auth.google import google_verifier
 from app.core.config import settings
+from app.core.db_pool import pool_monitor
+from app.core.hashing import HasherOverloadedError, password_hasher
+from app.core.http import ProviderUnavailableError, outbound_http
+from app.core.principal_cache import principal_cache
+from app.core.read_routing import ReadYourWritesMiddleware, read_router
+from app.core.redis import close_redis
+from app.core.sql_metrics import SQLInstrumentationMiddleware, instrument_engine
+from app.database import engine, replica_engine
 from app.notifications.websocket import connection_manager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
-    # Startup: Start Redis listener for notifications
+    # Startup: Open shared clients and start Redis listeners and key refresh
+    await outbound_http.start()
     await connection_manager.start_redis_listener()
+    await connection_manager.start_heartbeat()
+    await principal_cache.start_invalidation_listener()
+    await google_verifier.start()
+    await pool_monitor.start(settings.db_pool_metrics_interval_seconds)
     yield
-    # Shutdown: Stop Redis listener
+    # Shutdown: Stop background tasks and release shared clients and pools
+    await pool_monitor.stop()
+    await google_verifier.stop()
+    await principal_cache.stop_invalidation_listener()
+    await connection_manager.stop_heartbeat()
     await connection_manager.stop_redis_listener()
+    await close_redis()
+    await outbound_http.stop()
+    password_hasher.shutdown()
+    import_hasher.shutdown()
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
@@ -28,9 +52,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if read_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
+if settings.sql_instrumentation_enabled:
+    instrument_engine(engine)
+    if replica_engine is not None:
+        instrument_engine(replica_engine)
+    app.add_middleware(SQLInstrumentationMiddleware)
 
 app.include_router(api_router)
 
+
+@app.exception_handler(HasherOverloadedError)
+async def hasher_overloaded_handler(request: Request, exc: HasherOverloadedError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(ProviderUnavailableError)
+async def provider_unavailable_handler(request: Request, exc: ProviderUnavailableError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+    )
+
+
 os.makedirs(settings.upload_dir, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
 
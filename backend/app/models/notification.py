@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import JSON, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -11,6 +11,10 @@ from app.models.base import Base
 
 class Notification(Base):
     __tablename__ = "notifications"
+    # Fetch server-generated columns via RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+    # Monthly range partitions; see app/notifications/partitions.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -19,7 +23,6 @@ class Notification(Base):
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     type: Mapped[str] = mapped_column(
         String(50), nullable=False
@@ -31,11 +34,31 @@ class Notification(Base):
     )  # Optional action URL
     is_read: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     extra_data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Part of the primary key because the table is partitioned on it
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        nullable=False,
     )
     read_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
 
     user = relationship("User")
+
+
+# Newest-first feed per user, and the same restricted to unread rows
+Index(
+    "ix_notifications_user_id_created_at_id",
+    Notification.user_id,
+    Notification.created_at.desc(),
+    Notification.id.desc(),
+)
+Index(
+    "ix_notifications_user_id_unread",
+    Notification.user_id,
+    Notification.created_at.desc(),
+    Notification.id.desc(),
+    postgresql_where=Notification.is_read.is_(False),
+)
@@ -1,7 +1,7 @@
 import uuid
 from typing import Optional
 
-from sqlalchemy import JSON, String
+from sqlalchemy import JSON, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -10,6 +10,13 @@ from app.models.base import Base, TimestampMixin
 
 class User(Base, TimestampMixin):
     __tablename__ = "users"
+    # Keyset pagination of the admin listing, optionally filtered by role
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+    )
+    # Fetch server-generated columns via RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -26,3 +33,16 @@ class User(Base, TimestampMixin):
     role: Mapped[str] = mapped_column(String(50), nullable=False, default="USER")
     extra_data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, default=dict)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+
+
+# Case-insensitive prefix search (lower(column) LIKE 'abc%')
+Index(
+    "ix_users_lower_email_pattern",
+    func.lower(User.email).label("lower_email"),
+    postgresql_ops={"lower_email": "text_pattern_ops"},
+)
+Index(
+    "ix_users_lower_name_pattern",
+    func.lower(User.name).label("lower_name"),
+    postgresql_ops={"lower_name": "text_pattern_ops"},
+)
@@ -4,11 +4,29 @@ Redis-based notification broadcasting.
 This module provides functions to broadcast notifications via Redis pub/sub,
 allowing notifications to be sent from any process (CLI, Celery, API) and
 received by the WebSocket connections in the running server.
+
+Messages for a user are published on that user's channel
+(``notifications:user:<id>``), or on one of ``notification_channel_buckets``
+hashed channels when bucketing is enabled. Besides per-user messages there are
+topics: one publish on ``notifications:topic:<topic>`` reaches every socket
+subscribed to that topic on every instance. Each socket is implicitly
+subscribed to ``all`` and ``role:<ROLE>``; clients may subscribe to further
+topics themselves.
+
+Each server process holds one ``ChannelSubscriber``, which subscribes only to
+the channels of its locally connected users and topics, so an instance
+receives its own users' traffic rather than every message in the cluster.
+
+With ``notification_transport=streams`` per-user messages go to capped Redis
+Streams instead, so reconnecting clients can replay what they missed; see
+``app.notifications.streams``. Topics always use pub/sub.
 """
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, Set, Tuple
 from uuid import UUID
 
 import redis.asyncio as redis
@@ -17,7 +35,44 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-NOTIFICATION_CHANNEL = "notifications:broadcast"
+USER_CHANNEL_PREFIX = "notifications:user:"
+USER_STREAM_PREFIX = "notifications:stream:"
+TOPIC_CHANNEL_PREFIX = "notifications:topic:"
+
+# How long the listener waits for a message before applying subscription changes
+SUBSCRIBER_POLL_SECONDS = 0.1
+SUBSCRIBER_RETRY_SECONDS = 1.0
+
+ALL_TOPIC = "all"
+
+
+def role_topic(role: str) -> str:
+    return f"role:{role}"
+
+
+def _user_key_suffix(user_id: UUID) -> str:
+    buckets = settings.notification_channel_buckets
+    if buckets > 0:
+        return f"b{user_id.int % buckets}"
+    return str(user_id)
+
+
+def user_channel(user_id: UUID) -> str:
+    """Channel carrying ``user_id``'s messages: its own, or a shared hash bucket."""
+    return f"{USER_CHANNEL_PREFIX}{_user_key_suffix(user_id)}"
+
+
+def user_stream(user_id: UUID) -> str:
+    """Stream carrying ``user_id``'s messages when the streams transport is on."""
+    return f"{USER_STREAM_PREFIX}{_user_key_suffix(user_id)}"
+
+
+def uses_streams() -> bool:
+    return settings.notification_transport == "streams"
+
+
+def topic_channel(topic: str) -> str:
+    return f"{TOPIC_CHANNEL_PREFIX}{topic}"
 
 
 def get_redis_client() -> redis.Redis:
@@ -25,6 +80,27 @@ def get_redis_client() -> redis.Redis:
     return redis.from_url(settings.redis_url, decode_responses=True)
 
 
+def _encode(user_id: UUID, event: str, data: Dict[str, Any]) -> str:
+    return json.dumps({
+        "user_id": str(user_id),
+        "event": event,
+        "data": data,
+    })
+
+
+def _queue_user_message(target, user_id: UUID, event: str, data: Dict[str, Any]):
+    """Send (or, on a pipeline, queue) a per-user message on the configured transport."""
+    if uses_streams():
+        fields = {"user_id": str(user_id), "event": event, "data": json.dumps(data)}
+        return target.xadd(
+            user_stream(user_id),
+            fields,
+            maxlen=settings.notification_stream_maxlen,
+            approximate=True,
+        )
+    return target.publish(user_channel(user_id), _encode(user_id, event, data))
+
+
 async def publish_notification(user_id: UUID, event: str, data: Dict[str, Any]) -> None:
     """
     Publish a notification to Redis for broadcasting via WebSocket.
@@ -34,12 +110,7 @@ async def publish_notification(user_id: UUID, event: str, data: Dict[str, Any])
     """
     client = get_redis_client()
     try:
-        message = json.dumps({
-            "user_id": str(user_id),
-            "event": event,
-            "data": data,
-        })
-        await client.publish(NOTIFICATION_CHANNEL, message)
+        await _queue_user_message(client, user_id, event, data)
         logger.info(f"Published notification to Redis: {event} for user {user_id}")
     except Exception as e:
         logger.error(f"Failed to publish notification to Redis: {e}")
@@ -47,31 +118,194 @@ async def publish_notification(user_id: UUID, event: str, data: Dict[str, Any])
         await client.aclose()
 
 
-async def subscribe_to_notifications(callback):
+async def publish_many(
+    client: redis.Redis, messages: Iterable[Tuple[UUID, str, Dict[str, Any]]]
+) -> int:
     """
-    Subscribe to the notification channel and call the callback for each message.
+    Publish ``(user_id, event, data)`` messages in a single pipelined round trip.
 
-    This should be run as a background task in the FastAPI server.
+    The caller owns ``client`` and should reuse it across calls. Returns the
+    number of messages sent.
     """
-    client = get_redis_client()
-    pubsub = client.pubsub()
+    count = 0
+    async with client.pipeline(transaction=False) as pipe:
+        for user_id, event, data in messages:
+            _queue_user_message(pipe, user_id, event, data)
+            count += 1
+        await pipe.execute()
+    return count
+
 
+async def publish_to_topic(topic: str, event: str, data: Dict[str, Any]) -> int:
+    """
+    Publish one message to every socket subscribed to ``topic``, on all instances.
+
+    Returns the number of instances that received it (0 if Redis failed).
+    """
+    client = get_redis_client()
     try:
-        await pubsub.subscribe(NOTIFICATION_CHANNEL)
-        logger.info(f"Subscribed to Redis channel: {NOTIFICATION_CHANNEL}")
+        message = json.dumps({"topic": topic, "event": event, "data": data})
+        receivers = await client.publish(topic_channel(topic), message)
+        logger.info(f"Published {event} to topic {topic} ({receivers} instance(s))")
+        return receivers
+    except Exception as e:
+        logger.error(f"Failed to publish to topic {topic}: {e}")
+        return 0
+    finally:
+        await client.aclose()
 
-        async for message in pubsub.listen():
-            if message["type"] == "message":
+
+UserCallback = Callable[[UUID, str, Dict[str, Any]], Awaitable[None]]
+TopicCallback = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+
+
+class RedisSubscriber(ABC):
+    """
+    Base for listeners that follow a changing set of Redis channels or streams.
+
+    ``acquire``/``release`` are reference counted, because several sockets (or,
+    with bucketing, several users) share a channel. Changes are applied by the
+    ``_listen`` loop itself between reads, so only one task ever touches the
+    connection; ``wait_applied`` lets a caller wait until Redis has them.
+    """
+
+    name = "subscriber"
+
+    def __init__(self):
+        self._wanted: Dict[str, int] = {}
+        self._subscribed: Set[str] = set()
+        self._dirty = False
+        # Bumped on every change to the wanted set; _listen reports the
+        # version it has applied so callers can wait for their change
+        self._version = 0
+        self._applied_version = 0
+        self._applied = asyncio.Event()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        self._version += 1
+
+    def acquire(self, channel: str) -> None:
+        self._wanted[channel] = self._wanted.get(channel, 0) + 1
+        if self._wanted[channel] == 1:
+            self._changed()
+
+    def release(self, channel: str) -> None:
+        count = self._wanted.get(channel, 0) - 1
+        if count > 0:
+            self._wanted[channel] = count
+        else:
+            self._wanted.pop(channel, None)
+            self._changed()
+
+    def _mark_applied(self, version: int) -> None:
+        if version > self._applied_version:
+            self._applied_version = version
+            self._applied.set()
+            self._applied = asyncio.Event()
+
+    async def wait_applied(self, timeout: float) -> bool:
+        """Wait until every change made so far is in effect on Redis.
+
+        Returns False if that takes longer than ``timeout`` (e.g. Redis is down).
+        """
+        target = self._version
+        try:
+            async with asyncio.timeout(timeout):
+                while self._applied_version < target:
+                    await self._applied.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    def channel_count(self) -> int:
+        return len(self._subscribed)
+
+    @abstractmethod
+    async def _listen(self, *callbacks) -> None:
+        """Hold one Redis connection and deliver messages until it fails."""
+
+    async def run(self, *callbacks) -> None:
+        """
+        Deliver messages until cancelled, reconnecting if Redis goes away.
+
+        Run as a background task in the FastAPI server.
+        """
+        logger.info(f"Started Redis {self.name}")
+        while True:
+            try:
+                await self._listen(*callbacks)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis {self.name} error: {e}")
+                await asyncio.sleep(SUBSCRIBER_RETRY_SECONDS)
+
+
+class ChannelSubscriber(RedisSubscriber):
+    """One pub/sub connection subscribed to exactly the channels in use locally."""
+
+    name = "channel subscriber"
+
+    def __init__(self):
+        super().__init__()
+        self._sync_version = 0
+        self._unconfirmed: Set[str] = set()
+
+    async def _sync(self, pubsub) -> None:
+        self._dirty = False
+        self._sync_version = self._version
+        wanted = set(self._wanted)
+        added = wanted - self._subscribed
+        removed = self._subscribed - wanted
+        if added:
+            await pubsub.subscribe(*added)
+        if removed:
+            await pubsub.unsubscribe(*removed)
+        self._subscribed = wanted
+        # Applied once Redis has confirmed every new subscription
+        self._unconfirmed = (self._unconfirmed | added) & wanted
+        if not self._unconfirmed:
+            self._mark_applied(self._sync_version)
+
+    def _confirm(self, channel: str) -> None:
+        self._unconfirmed.discard(channel)
+        if not self._unconfirmed:
+            self._mark_applied(self._sync_version)
+
+    async def _listen(self, callback: UserCallback, topic_callback: TopicCallback) -> None:
+        client = get_redis_client()
+        pubsub = client.pubsub()
+        # A fresh connection starts with no subscriptions
+        self._subscribed = set()
+        self._unconfirmed = set()
+        self._dirty = True
+        try:
+            while True:
+                if self._dirty:
+                    await self._sync(pubsub)
+                if not self._subscribed:
+                    # Nothing to read from until a socket connects
+                    await asyncio.sleep(SUBSCRIBER_POLL_SECONDS)
+                    continue
+
+                message = await pubsub.get_message(timeout=SUBSCRIBER_POLL_SECONDS)
+                if message is None:
+                    continue
+                if message["type"] == "subscribe":
+                    self._confirm(message["channel"])
+                    continue
+                if message["type"] != "message":
+                    continue
                 try:
                     data = json.loads(message["data"])
-                    user_id = UUID(data["user_id"])
-                    event = data["event"]
-                    notification_data = data["data"]
-                    await callback(user_id, event, notification_data)
+                    if message["channel"].startswith(TOPIC_CHANNEL_PREFIX):
+                        await topic_callback(data["topic"], data["event"], data["data"])
+                    else:
+                        await callback(UUID(data["user_id"]), data["event"], data["data"])
                 except Exception as e:
                     logger.error(f"Error processing Redis message: {e}")
-    except Exception as e:
-        logger.error(f"Redis subscription error: {e}")
-    finally:
-        await pubsub.unsubscribe(NOTIFICATION_CHANNEL)
-        await client.aclose()
+        finally:
+            self._subscribed = set()
+            await pubsub.aclose()
+            await client.aclose()
@@ -0,0 +1,276 @@
+"""
+Notification fan-out for broadcasts.
+
+Sending one notification to many users walks the users table in ID order,
+``notification_fanout_batch_size`` recipients at a time. Each batch is:
+
+1. one ``INSERT INTO notifications ... SELECT ... FROM users ... RETURNING``,
+   so recipient IDs never round-trip through Python;
+2. one multi-row upsert of the recipients' inbox counters, committed together
+   with the rows;
+3. one pipelined publish of every new notification, over a Redis connection
+   reused for the whole broadcast.
+
+Used by ``send_notification.py`` and by the admin broadcast endpoint, which
+runs it as a background job and reports progress through the job store. When
+the recipients are everyone or one role, the endpoint skips the per-user
+publishes and sends a single message to the matching topic instead.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import any_, bindparam, func, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.config import settings
+from app.core.jobs import job_store
+from app.database import async_session
+from app.models.notification import Notification
+from app.models.notification_inbox import NotificationInbox
+from app.models.user import User
+from app.notifications.broadcast import (
+    ALL_TOPIC,
+    get_redis_client,
+    publish_many,
+    publish_to_topic,
+    role_topic,
+)
+from app.notifications.schemas import NotificationContent, NotificationResponse
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_EVENT = "new_notification"
+TOPIC_EVENT = "broadcast"
+
+# Called after each batch with (processed, total, elapsed_seconds)
+ProgressCallback = Callable[[int, int, float], Awaitable[None]]
+
+
+def _recipient_filter(role: Optional[str], user_ids: Optional[List[UUID]]):
+    conditions = []
+    if role is not None:
+        conditions.append(User.role == role)
+    if user_ids is not None:
+        # One array parameter, however many IDs there are
+        ids = bindparam("recipient_ids", user_ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+        conditions.append(User.id == any_(ids))
+    return conditions or [true()]
+
+
+def topic_message(content: NotificationContent, topic: str, persisted: bool) -> Dict[str, Any]:
+    """Payload of a topic broadcast.
+
+    The notification carries a fresh ID: persisted copies have per-user IDs
+    that clients pick up on their next fetch, and unpersisted ones exist only
+    in this message.
+    """
+    notification = NotificationResponse(
+        id=uuid4(),
+        type=content.type,
+        title=content.title,
+        message=content.message,
+        link=content.link,
+        is_read=False,
+        extra_data=content.extra_data,
+        created_at=datetime.now(timezone.utc),
+        read_at=None,
+    )
+    return {
+        "topic": topic,
+        "persisted": persisted,
+        "notification": notification.model_dump(mode="json"),
+    }
+
+
+async def count_recipients(
+    role: Optional[str] = None, user_ids: Optional[List[UUID]] = None
+) -> int:
+    async with async_session() as db:
+        stmt = select(func.count()).select_from(User).where(*_recipient_filter(role, user_ids))
+        return await db.scalar(stmt)
+
+
+def _insert_batch(
+    content: NotificationContent,
+    role: Optional[str],
+    user_ids: Optional[List[UUID]],
+    after: Optional[UUID],
+    batch_size: int,
+):
+    recipients = select(User.id).where(*_recipient_filter(role, user_ids))
+    if after is not None:
+        recipients = recipients.where(User.id > literal(after, User.id.type))
+    recipients = recipients.order_by(User.id).limit(batch_size).subquery()
+
+    rows = select(
+        func.gen_random_uuid(),
+        recipients.c.id,
+        literal(content.type, Notification.type.type),
+        literal(content.title, Notification.title.type),
+        literal(content.message, Notification.message.type),
+        literal(content.link, Notification.link.type),
+        literal(False, Notification.is_read.type),
+        literal(content.extra_data, Notification.extra_data.type),
+    )
+    return (
+        insert(Notification)
+        .from_select(
+            ["id", "user_id", "type", "title", "message", "link", "is_read", "extra_data"],
+            rows,
+        )
+        .returning(Notification.id, Notification.user_id, Notification.created_at)
+    )
+
+
+def _bump_inboxes(user_ids: List[UUID]):
+    # Sorted so concurrent broadcasts lock inbox rows in the same order
+    stmt = insert(NotificationInbox).values(
+        [{"user_id": user_id, "unread_count": 1, "total_count": 1} for user_id in sorted(user_ids)]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[NotificationInbox.user_id],
+        set_={
+            "unread_count": NotificationInbox.unread_count + 1,
+            "total_count": NotificationInbox.total_count + 1,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def _publish_rows(redis_client, content: NotificationContent, rows) -> None:
+    messages = [
+        (
+            row.user_id,
+            BROADCAST_EVENT,
+            NotificationResponse(
+                id=row.id,
+                type=content.type,
+                title=content.title,
+                message=content.message,
+                link=content.link,
+                is_read=False,
+                extra_data=content.extra_data,
+                created_at=row.created_at,
+                read_at=None,
+            ).model_dump(mode="json"),
+        )
+        for row in rows
+    ]
+    try:
+        await publish_many(redis_client, messages)
+    except Exception as e:
+        # The rows are committed; clients will see them on their next fetch
+        logger.error(f"Failed to publish broadcast batch to Redis: {e}")
+
+
+async def fan_out(
+    content: NotificationContent,
+    role: Optional[str] = None,
+    user_ids: Optional[List[UUID]] = None,
+    batch_size: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    publish: bool = True,
+) -> Dict[str, float]:
+    """Send ``content`` to every matching user (all users if no filter is given).
+
+    With ``publish=False`` the rows are only stored; the caller notifies
+    connected clients some other way (e.g. one topic publish).
+
+    Returns ``{"total", "sent", "elapsed_seconds", "rate"}``. A batch that is
+    committed is never re-sent, so a failure part way leaves earlier batches
+    delivered and raises.
+    """
+    batch_size = max(batch_size or settings.notification_fanout_batch_size, 1)
+    total = await count_recipients(role, user_ids)
+    started = time.monotonic()
+    sent = 0
+    after: Optional[UUID] = None
+
+    redis_client = get_redis_client() if publish else None
+    try:
+        async with async_session() as db:
+            while True:
+                result = await db.execute(
+                    _insert_batch(content, role, user_ids, after, batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                await db.execute(_bump_inboxes([row.user_id for row in rows]))
+                await db.commit()
+
+                if publish:
+                    await _publish_rows(redis_client, content, rows)
+
+                sent += len(rows)
+                after = max(row.user_id for row in rows)
+                if on_progress is not None:
+                    await on_progress(sent, max(total, sent), time.monotonic() - started)
+                if len(rows) < batch_size:
+                    break
+    finally:
+        if redis_client is not None:
+            await redis_client.aclose()
+
+    elapsed = time.monotonic() - started
+    rate = sent / elapsed if elapsed > 0 else float(sent)
+    logger.info(f"Broadcast sent {sent} notifications in {elapsed:.1f}s ({rate:.0f}/s)")
+    return {"total": max(total, sent), "sent": sent, "elapsed_seconds": elapsed, "rate": rate}
+
+
+async def create_broadcast_job(total: int, admin_id: UUID) -> str:
+    return await job_store.create(
+        "notification_broadcast",
+        owner_id=str(admin_id),
+        total=total,
+        processed=0,
+        rate=0,
+        elapsed_seconds=0,
+    )
+
+
+async def run_broadcast(
+    job_id: str,
+    content: NotificationContent,
+    role: Optional[str],
+    user_ids: Optional[List[UUID]],
+) -> None:
+    """Run a broadcast to completion, recording progress in the job store.
+
+    Everyone and role broadcasts are announced with one topic publish once all
+    rows are stored, instead of one publish per recipient.
+    """
+    topic = None
+    if user_ids is None:
+        topic = role_topic(role) if role is not None else ALL_TOPIC
+
+    async def record_progress(processed: int, total: int, elapsed: float) -> None:
+        await job_store.update(
+            job_id,
+            processed=processed,
+            total=total,
+            elapsed_seconds=round(elapsed, 3),
+            rate=round(processed / elapsed, 1) if elapsed > 0 else 0,
+        )
+
+    await job_store.update(job_id, status="running")
+    try:
+        await fan_out(
+            content,
+            role=role,
+            user_ids=user_ids,
+            on_progress=record_progress,
+            publish=topic is None,
+        )
+        if topic is not None:
+            await publish_to_topic(topic, TOPIC_EVENT, topic_message(content, topic, True))
+        status = "completed"
+    except Exception as e:
+        logger.error(f"Notification broadcast {job_id} failed: {e}")
+        status = "failed"
+    await job_store.update(job_id, status=status)
@@ -0,0 +1,304 @@
+"""
+Monthly partition maintenance for the notifications table.
+
+``notifications`` is range-partitioned on ``created_at`` with one partition
+per calendar month (``notifications_pYYYYMM``, UTC bounds) and a default
+partition that catches anything outside them. Celery beat runs
+``maintain_partitions`` daily to:
+
+- create partitions a few months ahead, so inserts never land in the default
+  partition;
+- apply retention: a month older than ``notification_retention_months`` is
+  detached and then dropped, or kept as ``notifications_archive_YYYYMM``.
+  Removing a month is a catalog operation rather than a large ``DELETE``, so
+  it causes no table bloat or vacuum debt.
+
+With ``notification_retention_keep_unread`` the month's unread notifications
+are copied back into the table before it is removed (they land in the
+default partition), so nobody loses something they have not seen yet. The
+inbox counters are adjusted in the transaction that removes the month.
+
+Only the detach itself holds a lock on ``notifications``; the copying and
+counting run afterwards against the detached table, in short transactions.
+"""
+
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "notifications"
+DEFAULT_PARTITION = "notifications_default"
+PARTITION_PATTERN = re.compile(r"^notifications_p(\d{4})(\d{2})$")
+COLUMNS = "id, user_id, type, title, message, link, is_read, extra_data, created_at, read_at"
+DETACH_LOCK_TIMEOUT = "5s"
+RETENTION_BATCH_SIZE = 5000
+
+# Unread as the inbox counts it: not read and not covered by the read watermark
+UNREAD_CONDITION = """
+    NOT n.is_read
+    AND (i.read_through_at IS NULL
+         OR (n.created_at, n.id) > (i.read_through_at, i.read_through_id))
+"""
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    today = datetime.now(timezone.utc).date()
+    return date(today.year, today.month, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month} 00:00:00+00"
+
+
+async def list_partitions(conn: AsyncConnection) -> Dict[date, str]:
+    """Monthly partitions currently attached, keyed by the month they cover."""
+    result = await conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    partitions = {}
+    for name in result.scalars():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def _create_partition(conn: AsyncConnection, month: date) -> None:
+    name = partition_name(month)
+    start, end = _bound(month), _bound(add_months(month, 1))
+    in_range = f"created_at >= '{start}' AND created_at < '{end}'"
+    stray = await conn.scalar(
+        text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}")
+    )
+    if not stray:
+        await conn.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+        return
+
+    # Postgres refuses a new partition while the default one holds rows for
+    # its range, so move them into a standalone table and attach that instead
+    await conn.execute(
+        text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    )
+    await conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}
+                RETURNING {COLUMNS}
+            )
+            INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved
+            """
+        )
+    )
+    await conn.execute(
+        text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    logger.info(f"Moved {stray} notifications from {DEFAULT_PARTITION} into {name}")
+
+
+async def ensure_partitions(engine: AsyncEngine, months_ahead: int) -> List[str]:
+    """Create any missing partitions from this month to ``months_ahead`` ahead."""
+    async with engine.connect() as conn:
+        existing = await list_partitions(conn)
+
+    created = []
+    first = current_month()
+    for offset in range(max(months_ahead, 0) + 1):
+        month = add_months(first, offset)
+        if month in existing:
+            continue
+        try:
+            async with engine.begin() as conn:
+                await _create_partition(conn, month)
+        except Exception as e:
+            logger.error(f"Failed to create partition {partition_name(month)}: {e}")
+            continue
+        created.append(partition_name(month))
+    if created:
+        logger.info(f"Created notification partitions: {', '.join(created)}")
+    return created
+
+
+async def list_detached(conn: AsyncConnection) -> Dict[date, str]:
+    """Monthly tables left detached by an interrupted retention run."""
+    result = await conn.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_class c
+            WHERE c.relkind = 'r'
+              AND c.relname LIKE :prefix
+              AND NOT c.relispartition
+            """
+        ),
+        {"prefix": f"{PARENT_TABLE}\\_p%"},
+    )
+    tables = {}
+    for name in result.scalars():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            tables[date(int(match[1]), int(match[2]), 1)] = name
+    return tables
+
+
+async def _detach_partition(engine: AsyncEngine, name: str) -> None:
+    # DETACH ... CONCURRENTLY is not allowed while a default partition exists,
+    # so keep the ACCESS EXCLUSIVE lock on the parent to this one statement,
+    # and give up rather than queue every other query behind it
+    async with engine.begin() as conn:
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+        await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+
+
+async def _restore_unread(engine: AsyncEngine, name: str) -> int:
+    """Move unread rows from a detached month back into the table, in batches."""
+    restored = 0
+    while True:
+        # The month no longer has a partition, so these land in the default one
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                text(
+                    f"""
+                    WITH kept AS (
+                        DELETE FROM {name}
+                        WHERE ctid IN (
+                            SELECT n.ctid FROM {name} n
+                            LEFT JOIN notification_inbox i ON i.user_id = n.user_id
+                            WHERE {UNREAD_CONDITION}
+                            LIMIT :batch_size
+                        )
+                        RETURNING {COLUMNS}
+                    )
+                    INSERT INTO {PARENT_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM kept
+                    """
+                ),
+                {"batch_size": RETENTION_BATCH_SIZE},
+            )
+        restored += result.rowcount
+        if result.rowcount < RETENTION_BATCH_SIZE:
+            return restored
+
+
+async def _retire_partition(
+    engine: AsyncEngine, month: date, name: str, action: str, keep_unread: bool, attached: bool
+) -> int:
+    """Detach one month and drop or archive it. Returns the rows removed.
+
+    Only the detach locks the parent table. Once detached the month is a
+    standalone table nothing else reads, so restoring unread rows and
+    adjusting the inbox counters no longer block notification traffic. A run
+    interrupted after the detach is picked up again from the detached table.
+    """
+    if attached:
+        await _detach_partition(engine, name)
+
+    if keep_unread:
+        await _restore_unread(engine, name)
+
+    # Counters and removal commit together, so a retry cannot subtract twice
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                f"""
+                UPDATE notification_inbox inbox
+                SET total_count = greatest(inbox.total_count - removed.total, 0),
+                    unread_count = greatest(inbox.unread_count - removed.unread, 0),
+                    updated_at = now()
+                FROM (
+                    SELECT n.user_id,
+                           count(*) AS total,
+                           count(*) FILTER (WHERE {UNREAD_CONDITION}) AS unread
+                    FROM {name} n
+                    LEFT JOIN notification_inbox i ON i.user_id = n.user_id
+                    GROUP BY n.user_id
+                ) removed
+                WHERE inbox.user_id = removed.user_id
+                """
+            )
+        )
+        removed = await conn.scalar(text(f"SELECT count(*) FROM {name}"))
+
+        if action == "detach":
+            await conn.execute(
+                text(f"ALTER TABLE {name} RENAME TO {PARENT_TABLE}_archive_{month:%Y%m}")
+            )
+        else:
+            await conn.execute(text(f"DROP TABLE {name}"))
+    return removed
+
+
+async def apply_retention(
+    engine: AsyncEngine, retention_months: int, action: str, keep_unread: bool
+) -> List[str]:
+    """Remove monthly partitions that ended more than ``retention_months`` ago."""
+    if retention_months <= 0:
+        return []
+    if action not in ("drop", "detach"):
+        logger.error(f"Unknown notification retention action: {action}")
+        return []
+
+    cutoff = add_months(current_month(), -retention_months)
+    async with engine.connect() as conn:
+        partitions = {month: (name, True) for month, name in (await list_partitions(conn)).items()}
+        for month, name in (await list_detached(conn)).items():
+            partitions.setdefault(month, (name, False))
+
+    retired = []
+    for month, (name, attached) in sorted(partitions.items()):
+        if month >= cutoff:
+            break
+        try:
+            removed = await _retire_partition(engine, month, name, action, keep_unread, attached)
+        except Exception as e:
+            logger.error(f"Failed to apply retention to partition {name}: {e}")
+            continue
+        retired.append(name)
+        outcome = "archived" if action == "detach" else "dropped"
+        logger.info(f"Notification partition {name} {outcome} ({removed} rows removed)")
+    return retired
+
+
+async def maintain_partitions(engine: AsyncEngine) -> Dict[str, List[str]]:
+    """Run partition creation and retention with the configured settings."""
+    created = await ensure_partitions(engine, settings.notification_partition_months_ahead)
+    retired = await apply_retention(
+        engine,
+        settings.notification_retention_months,
+        settings.notification_retention_action,
+        settings.notification_retention_keep_unread,
+    )
+    return {"created": created, "retired": retired}
@@ -1,24 +1,53 @@
+import json
 import logging
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.dependencies import Principal, get_db, get_principal, get_read_db, require
+from app.core.jobs import job_store
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.read_routing import read_router
 from app.core.security import decode_access_token
 from app.models.user import User
 from app.notifications import service
+from app.notifications.fanout import (
+    TOPIC_EVENT,
+    count_recipients,
+    create_broadcast_job,
+    run_broadcast,
+    topic_message,
+)
 from app.notifications.schemas import (
+    BroadcastJob,
+    BroadcastRequest,
     MarkReadRequest,
+    NotificationContent,
     NotificationCreate,
     NotificationListResponse,
     NotificationResponse,
 )
-from app.notifications.broadcast import publish_notification
-from app.notifications.websocket import connection_manager
+from app.notifications.broadcast import (
+    ALL_TOPIC,
+    publish_notification,
+    publish_to_topic,
+    uses_streams,
+)
+from app.notifications.streams import is_event_id, replay_events
+from app.notifications.websocket import connection_manager, is_client_topic
 
 logger = logging.getLogger(__name__)
 
@@ -40,13 +69,9 @@ class SendNotificationRequest(BaseModel):
 async def send_notification(
     request: SendNotificationRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(require("system.manage")),
 ):
     """Send a notification to a user (admin only). Broadcasts via WebSocket if connected."""
-    # Only admins can send notifications
-    if current_user.role != "ADMIN":
-        raise HTTPException(status_code=403, detail="Only admins can send notifications")
-
     # Get target user
     if request.user_id:
         target_user_id = request.user_id
@@ -85,32 +110,95 @@ async def send_notification(
     return notification
 
 
+@router.post("/broadcast", response_model=BroadcastJob, status_code=status.HTTP_202_ACCEPTED)
+async def broadcast_notification(
+    request: BroadcastRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(require("system.manage")),
+):
+    """Send one notification to all users, a role or a list of users (admin only)."""
+    total = await count_recipients(request.role, request.user_ids)
+    if total == 0:
+        raise HTTPException(status_code=404, detail="No matching users")
+
+    content = NotificationContent(
+        **request.model_dump(include=set(NotificationContent.model_fields))
+    )
+    job_id = await create_broadcast_job(total, current_user.id)
+    background_tasks.add_task(run_broadcast, job_id, content, request.role, request.user_ids)
+    return await job_store.get(job_id)
+
+
+@router.get("/broadcast/{job_id}", response_model=BroadcastJob)
+async def get_broadcast_job(
+    job_id: str, current_user: Principal = Depends(require("system.manage"))
+):
+    """Progress and throughput of a broadcast."""
+    job = await job_store.get(job_id)
+    if job is None or job.get("kind") != "notification_broadcast":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Broadcast not found")
+    return job
+
+
+@router.post("/topics/{topic}")
+async def publish_topic_notification(
+    topic: str,
+    content: NotificationContent,
+    current_user: Principal = Depends(require("system.manage")),
+):
+    """Show a notification to every socket on a topic, without storing it (admin only).
+
+    ``topic`` is ``all``, ``role:<ROLE>`` or a client-subscribed topic. Use
+    ``POST /broadcast`` to store a copy for each user instead.
+    """
+    valid_role_topic = topic.startswith("role:") and topic[5:] in ("ADMIN", "STAFF", "USER")
+    if topic != ALL_TOPIC and not valid_role_topic and not is_client_topic(topic):
+        raise HTTPException(status_code=400, detail="Invalid topic")
+
+    instances = await publish_to_topic(
+        topic, TOPIC_EVENT, topic_message(content, topic, persisted=False)
+    )
+    return {"topic": topic, "instances": instances}
+
+
 @router.get("/", response_model=NotificationListResponse)
 async def get_notifications(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    before: Optional[str] = Query(None, description="next_cursor from the previous page"),
     unread_only: bool = Query(False),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_principal),
 ):
-    """Get paginated list of notifications for the current user."""
-    notifications = await service.get_user_notifications(
-        db, current_user.id, limit=limit, offset=offset, unread_only=unread_only
+    """Get a page of notifications for the current user, with unread and total counts."""
+    before_key = None
+    if before:
+        try:
+            before_key = decode_cursor(before)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    notifications, unread_count, total, next_key = await service.get_notification_page(
+        db,
+        current_user.id,
+        limit=limit,
+        offset=offset,
+        unread_only=unread_only,
+        before=before_key,
     )
-    unread_count = await service.get_unread_count(db, current_user.id)
-    total = await service.get_total_count(db, current_user.id)
 
     return NotificationListResponse(
         notifications=[NotificationResponse.model_validate(n) for n in notifications],
         unread_count=unread_count,
         total=total,
+        next_cursor=encode_cursor(*next_key) if next_key else None,
     )
 
 
 @router.get("/unread-count")
 async def get_unread_count(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_principal),
 ):
     """Get just the unread notification count."""
     count = await service.get_unread_count(db, current_user.id)
@@ -121,7 +209,7 @@ async def get_unread_count(
 async def mark_notifications_read(
     request: MarkReadRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     """Mark specific notifications as read."""
     updated = await service.mark_as_read(db, current_user.id, request.notification_ids)
@@ -138,7 +226,7 @@ async def mark_notifications_read(
 @router.post("/mark-all-read")
 async def mark_all_notifications_read(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_principal),
 ):
     """Mark all notifications as read."""
     updated = await service.mark_all_as_read(db, current_user.id)
@@ -151,11 +239,52 @@ async def mark_all_notifications_read(
     return {"updated": updated, "unread_count": 0}
 
 
+async def _handle_client_message(websocket: WebSocket, raw: str) -> None:
+    """Apply a JSON ``{"action": "subscribe"|"unsubscribe", "topic": ...}`` message."""
+    try:
+        message = json.loads(raw)
+        action, topic = message["action"], str(message["topic"])
+    except (ValueError, KeyError, TypeError):
+        await connection_manager.send(
+            websocket, {"event": "error", "data": {"detail": "Invalid message"}}
+        )
+        return
+
+    if action == "subscribe":
+        ok = connection_manager.subscribe(websocket, topic)
+        event = "subscribed"
+    elif action == "unsubscribe":
+        ok = connection_manager.unsubscribe(websocket, topic)
+        event = "unsubscribed"
+    else:
+        ok, event = False, "error"
+
+    if ok:
+        await connection_manager.send(websocket, {"event": event, "data": {"topic": topic}})
+    else:
+        await connection_manager.send(
+            websocket,
+            {"event": "error", "data": {"detail": f"Cannot {action} {topic}", "topic": topic}},
+        )
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time notifications.
 
     Connect with: ws://localhost:8001/notifications/ws?token=<jwt_token>
+
+    The ``connected`` event is written only once this instance's Redis
+    subscriptions for the socket are in effect, so everything published after
+    the client sees it is delivered.
+
+    With the streams transport, a reconnecting client adds
+    ``&last_event_id=<id>`` (the ``id`` of the last event it received) and the
+    events it missed are replayed from Redis, followed by a
+    ``notification_count`` event with the current unread count (some count
+    changes, such as topic broadcasts and mark-read, are not in the stream).
+    A ``resync`` event means the gap could not be replayed and the client
+    should refetch.
     """
     # Get token from query params
     token = websocket.query_params.get("token")
@@ -185,27 +314,58 @@ async def websocket_endpoint(websocket: WebSocket):
         return
 
     logger.info(f"WebSocket connection attempt for user {user_id}")
-    await connection_manager.connect(websocket, user_id)
+    replayed, resync, latest_id, resumed = [], False, None, False
+    stream_start = None
+    if uses_streams():
+        last_event_id = websocket.query_params.get("last_event_id")
+        if last_event_id and not is_event_id(last_event_id):
+            last_event_id = None
+        # Read the replay before subscribing, and subscribe from its end, so
+        # entries added in between are delivered live rather than lost
+        replayed, resync, latest_id = await replay_events(user_id, last_event_id)
+        resumed = bool(last_event_id) and not resync
+        stream_start = latest_id or "0-0"
+
+    # Counter-table lookup, read after the replay so it already includes it
+    async with await read_router.open_session(user_id) as db:
+        unread_count = await service.get_unread_count(db, user_id)
+
+    connected = {"last_event_id": latest_id, "resumed": resumed}
+    if not resumed:
+        connected["unread_count"] = unread_count
+    initial = [{"event": "connected", "data": connected}, *replayed]
+    if resync:
+        initial.append({"event": "resync", "data": {"last_event_id": latest_id}})
+    if resumed:
+        # Replayed events have moved the client's count; set it exactly
+        initial.append({"event": "notification_count", "data": {"unread_count": unread_count}})
+
+    # Queued ahead of any live delivery, so the client sees the replay before
+    # newer entries and never skips it as already seen
+    await connection_manager.connect(
+        websocket,
+        user_id,
+        role=payload.get("role"),
+        stream_start=stream_start,
+        initial=initial,
+    )
 
     try:
-        # Send initial unread count
-        from app.database import async_session
-
-        async with async_session() as db:
-            unread_count = await service.get_unread_count(db, user_id)
-
-        await websocket.send_json(
-            {"event": "connected", "data": {"unread_count": unread_count}}
-        )
         logger.info(f"WebSocket fully connected for user {user_id}")
 
         # Keep connection alive and listen for client messages
         while True:
             data = await websocket.receive_text()
+            connection_manager.touch(websocket)
 
-            # Handle ping/pong for connection keep-alive
+            # Handle ping/pong for connection keep-alive; "pong" answers our heartbeat
             if data == "ping":
-                await websocket.send_text("pong")
+                await connection_manager.send_text(websocket, "pong")
+                continue
+            if data == "pong":
+                continue
+
+            await _handle_client_message(websocket, data)
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for user {user_id}")
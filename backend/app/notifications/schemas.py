@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class NotificationCreate(BaseModel):
@@ -16,6 +16,40 @@ class NotificationCreate(BaseModel):
     extra_data: Optional[Dict[str, Any]] = None
 
 
+class NotificationContent(BaseModel):
+    """What a broadcast sends to every recipient."""
+
+    type: str = Field("info", pattern="^(info|success|warning|error)$")
+    title: str = Field(..., min_length=1, max_length=255)
+    message: Optional[str] = None
+    link: Optional[str] = Field(None, max_length=500)
+    extra_data: Optional[Dict[str, Any]] = None
+
+
+class BroadcastRequest(NotificationContent):
+    """Broadcast recipients: everyone, one role, or explicit user IDs."""
+
+    all_users: bool = False
+    role: Optional[Literal["ADMIN", "STAFF", "USER"]] = None
+    user_ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=100000)
+
+    @model_validator(mode="after")
+    def check_one_target(self) -> "BroadcastRequest":
+        targets = [self.all_users, self.role is not None, self.user_ids is not None]
+        if sum(targets) != 1:
+            raise ValueError("Provide exactly one of all_users, role or user_ids")
+        return self
+
+
+class BroadcastJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "completed", "failed"]
+    total: int
+    processed: int
+    rate: float = 0  # notifications per second so far
+    elapsed_seconds: float = 0
+
+
 class NotificationResponse(BaseModel):
     """Schema for notification response to client."""
 
@@ -38,6 +72,7 @@ class NotificationListResponse(BaseModel):
     notifications: List[NotificationResponse]
     unread_count: int
     total: int
+    next_cursor: Optional[str] = None  # pass as ``before`` to fetch the next page
 
 
 class MarkReadRequest(BaseModel):
@@ -1,13 +1,73 @@
+import logging
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import func, select, update
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, literal, or_, select, true, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.config import settings
 from app.models.notification import Notification
+from app.models.notification_inbox import NotificationInbox
+from app.models.user import User
 from app.notifications.schemas import NotificationCreate
 
+logger = logging.getLogger(__name__)
+
+
+async def _bump_inbox(db: AsyncSession, user_id: UUID, unread: int, total: int) -> None:
+    """Add to a user's counters, creating the inbox row on first use.
+
+    Runs inside the caller's transaction so counters commit with the change.
+    """
+    stmt = insert(NotificationInbox).values(
+        user_id=user_id, unread_count=max(unread, 0), total_count=max(total, 0)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationInbox.user_id],
+        set_={
+            "unread_count": func.greatest(NotificationInbox.unread_count + unread, 0),
+            "total_count": func.greatest(NotificationInbox.total_count + total, 0),
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+def _inbox_value(user_id: UUID, column):
+    return select(column).where(NotificationInbox.user_id == user_id).scalar_subquery()
+
+
+def _after_watermark(user_id: UUID):
+    """Condition: the notification is newer than the user's read watermark, if any.
+
+    Rows at or before the watermark count as read whatever their ``is_read``.
+    """
+    read_through_at = _inbox_value(user_id, NotificationInbox.read_through_at)
+    read_through_id = _inbox_value(user_id, NotificationInbox.read_through_id)
+    return or_(
+        read_through_at.is_(None),
+        tuple_(Notification.created_at, Notification.id)
+        > tuple_(read_through_at, read_through_id),
+    )
+
+
+def _apply_watermark(
+    notifications: List[Notification],
+    read_through_at: Optional[datetime],
+    read_through_id: Optional[UUID],
+) -> None:
+    """Show rows covered by the watermark as read, without marking them dirty."""
+    if read_through_at is None:
+        return
+    watermark = (read_through_at, read_through_id)
+    for notification in notifications:
+        if not notification.is_read and (notification.created_at, notification.id) <= watermark:
+            set_committed_value(notification, "is_read", True)
+
 
 async def create_notification(
     db: AsyncSession, data: NotificationCreate
@@ -22,48 +82,104 @@ async def create_notification(
         extra_data=data.extra_data,
     )
     db.add(notification)
+    await db.flush()
+    await _bump_inbox(db, data.user_id, unread=1, total=1)
     await db.commit()
-    await db.refresh(notification)
     return notification
 
 
-async def get_user_notifications(
+async def get_notification_page(
     db: AsyncSession,
     user_id: UUID,
     limit: int = 20,
     offset: int = 0,
     unread_only: bool = False,
-) -> List[Notification]:
-    """Get notifications for a user, ordered by created_at desc."""
-    stmt = select(Notification).where(Notification.user_id == user_id)
-    if unread_only:
-        stmt = stmt.where(Notification.is_read == False)  # noqa: E712
-    stmt = stmt.order_by(Notification.created_at.desc()).limit(limit).offset(offset)
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
+    before: Optional[Tuple[datetime, UUID]] = None,
+) -> Tuple[List[Notification], int, int, Optional[Tuple[datetime, UUID]]]:
+    """Get a page of notifications (newest first) together with the user's counts.
 
+    Pass ``before`` (the ``(created_at, id)`` of the last row seen) for keyset
+    pagination; ``offset`` is kept for older clients. The page and both counts
+    come back in one statement: the counters row is lateral-joined to the page,
+    so an empty page still yields the counts.
 
-async def get_unread_count(db: AsyncSession, user_id: UUID) -> int:
-    """Get count of unread notifications for a user."""
-    stmt = (
-        select(func.count())
-        .select_from(Notification)
-        .where(
-            Notification.user_id == user_id,
+    Returns ``(notifications, unread_count, total, next_key)``, where
+    ``next_key`` is the ``before`` value for the following page, if any.
+    """
+    page = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        page = page.where(
             Notification.is_read == False,  # noqa: E712
+            _after_watermark(user_id),
+        )
+    if before is not None:
+        created_at, last_id = before
+        page = page.where(
+            tuple_(Notification.created_at, Notification.id)
+            < tuple_(
+                literal(created_at, Notification.created_at.type),
+                literal(last_id, Notification.id.type),
+            )
         )
+    page = (
+        page.order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(limit + 1)
+        .offset(offset)
+        .subquery()
+        .lateral()
     )
-    result = await db.execute(stmt)
-    return result.scalar() or 0
+    notification = aliased(Notification, page, name="notification")
+
+    # One inbox lookup; the outer join keeps a row for users without an inbox yet
+    counts = (
+        select(
+            func.coalesce(NotificationInbox.unread_count, 0).label("unread_count"),
+            func.coalesce(NotificationInbox.total_count, 0).label("total"),
+            NotificationInbox.read_through_at,
+            NotificationInbox.read_through_id,
+        )
+        .select_from(select(literal(1)).subquery())
+        .outerjoin(NotificationInbox, NotificationInbox.user_id == user_id)
+        .subquery()
+    )
+    stmt = (
+        select(counts, notification)
+        .select_from(counts)
+        .outerjoin(page, true())
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    rows = (await db.execute(stmt)).all()
+
+    first = rows[0]
+    unread_count, total = first.unread_count, first.total
+    notifications = [row.notification for row in rows if row.notification is not None]
+    _apply_watermark(notifications, first.read_through_at, first.read_through_id)
+    next_key = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_key = (notifications[-1].created_at, notifications[-1].id)
+    return notifications, unread_count, total, next_key
+
+
+async def get_counts(db: AsyncSession, user_id: UUID) -> Tuple[int, int]:
+    """Get (unread, total) notification counts for a user from the inbox counters."""
+    stmt = select(NotificationInbox.unread_count, NotificationInbox.total_count).where(
+        NotificationInbox.user_id == user_id
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    return (row.unread_count, row.total_count) if row else (0, 0)
+
+
+async def get_unread_count(db: AsyncSession, user_id: UUID) -> int:
+    """Get count of unread notifications for a user."""
+    unread, _ = await get_counts(db, user_id)
+    return unread
 
 
 async def get_total_count(db: AsyncSession, user_id: UUID) -> int:
     """Get total count of notifications for a user."""
-    stmt = (
-        select(func.count()).select_from(Notification).where(Notification.user_id == user_id)
-    )
-    result = await db.execute(stmt)
-    return result.scalar() or 0
+    _, total = await get_counts(db, user_id)
+    return total
 
 
 async def mark_as_read(
@@ -76,35 +192,147 @@ async def mark_as_read(
             Notification.user_id == user_id,
             Notification.id.in_(notification_ids),
             Notification.is_read == False,  # noqa: E712
+            _after_watermark(user_id),
         )
         .values(is_read=True, read_at=datetime.now(timezone.utc))
     )
     result = await db.execute(stmt)
+    if result.rowcount:
+        await _bump_inbox(db, user_id, unread=-result.rowcount, total=0)
     await db.commit()
     return result.rowcount
 
 
 async def mark_all_as_read(db: AsyncSession, user_id: UUID) -> int:
-    """Mark all notifications as read for a user."""
+    """Mark all notifications as read for a user. Returns how many became read."""
+    if settings.notification_read_watermark:
+        return await _advance_watermark(db, user_id)
+
     stmt = (
         update(Notification)
         .where(
             Notification.user_id == user_id,
             Notification.is_read == False,  # noqa: E712
+            _after_watermark(user_id),
         )
         .values(is_read=True, read_at=datetime.now(timezone.utc))
     )
     result = await db.execute(stmt)
+    # Subtract rather than zero, so a notification created concurrently still counts
+    if result.rowcount:
+        await _bump_inbox(db, user_id, unread=-result.rowcount, total=0)
     await db.commit()
     return result.rowcount
 
 
+async def _advance_watermark(db: AsyncSession, user_id: UUID) -> int:
+    """Move the read watermark to the newest notification: a single-row write."""
+    result = await db.execute(
+        select(NotificationInbox)
+        .where(NotificationInbox.user_id == user_id)
+        .with_for_update()
+    )
+    inbox = result.scalar_one_or_none()
+    if inbox is None or inbox.unread_count == 0:
+        await db.rollback()
+        return 0
+
+    result = await db.execute(
+        select(Notification.created_at, Notification.id)
+        .where(Notification.user_id == user_id)
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(1)
+    )
+    newest = result.one_or_none()
+    if newest is None:
+        await db.rollback()
+        return 0
+
+    marked = inbox.unread_count
+    inbox.read_through_at, inbox.read_through_id = newest.created_at, newest.id
+    inbox.unread_count = 0
+    await db.commit()
+    return marked
+
+
 async def get_notification(
     db: AsyncSession, notification_id: UUID, user_id: UUID
 ) -> Optional[Notification]:
     """Get a single notification by ID, ensuring it belongs to the user."""
-    stmt = select(Notification).where(
-        Notification.id == notification_id, Notification.user_id == user_id
-    )
-    result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    stmt = select(
+        Notification,
+        _inbox_value(user_id, NotificationInbox.read_through_at).label("read_through_at"),
+        _inbox_value(user_id, NotificationInbox.read_through_id).label("read_through_id"),
+    ).where(Notification.id == notification_id, Notification.user_id == user_id)
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    _apply_watermark([row.Notification], row.read_through_at, row.read_through_id)
+    return row.Notification
+
+
+async def reconcile_inbox_counts(
+    session_factory: async_sessionmaker, batch_size: int = 1000
+) -> int:
+    """Recompute every user's counters from the notifications table.
+
+    Users are processed in batches, each in a REPEATABLE READ transaction, so a
+    batch that races a concurrent notification write fails instead of
+    overwriting it; the next run picks it up. Returns the number of corrected
+    rows.
+    """
+    corrected = 0
+    last_id: Optional[UUID] = None
+    while True:
+        async with session_factory() as db:
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            stmt = select(User.id).order_by(User.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(User.id > last_id)
+            user_ids = list((await db.execute(stmt)).scalars().all())
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            unread = and_(
+                Notification.is_read.is_(False),
+                or_(
+                    NotificationInbox.read_through_at.is_(None),
+                    tuple_(Notification.created_at, Notification.id)
+                    > tuple_(NotificationInbox.read_through_at, NotificationInbox.read_through_id),
+                ),
+            )
+            counts = (
+                select(
+                    User.id,
+                    func.count(Notification.id).filter(unread),
+                    func.count(Notification.id),
+                )
+                .outerjoin(Notification, Notification.user_id == User.id)
+                .outerjoin(NotificationInbox, NotificationInbox.user_id == User.id)
+                .where(User.id.in_(user_ids))
+                .group_by(User.id)
+            )
+            upsert = insert(NotificationInbox).from_select(
+                ["user_id", "unread_count", "total_count"], counts
+            )
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[NotificationInbox.user_id],
+                set_={
+                    "unread_count": upsert.excluded.unread_count,
+                    "total_count": upsert.excluded.total_count,
+                    "updated_at": func.now(),
+                },
+                where=or_(
+                    NotificationInbox.unread_count != upsert.excluded.unread_count,
+                    NotificationInbox.total_count != upsert.excluded.total_count,
+                ),
+            ).returning(NotificationInbox.user_id)
+            try:
+                result = await db.execute(upsert)
+                corrected += len(result.all())
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.warning(f"Skipped inbox reconciliation batch after {last_id}: {e}")
+    return corrected
@@ -0,0 +1,170 @@
+"""
+Redis Streams delivery of per-user notifications.
+
+With ``notification_transport=streams`` per-user messages are appended to
+capped streams (``notifications:stream:<id>``, or hash buckets) instead of
+being published, so they outlive the moment of sending:
+
+- each server process runs a ``StreamSubscriber`` that ``XREAD``s the streams
+  of its locally connected users and forwards new entries, tagged with their
+  entry ID;
+- a reconnecting client sends the last entry ID it saw, and the events it
+  missed are replayed from the stream rather than refetched from Postgres.
+  If the stream was trimmed past that point the client is told to resync.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.notifications.broadcast import (
+    SUBSCRIBER_POLL_SECONDS,
+    RedisSubscriber,
+    get_redis_client,
+    user_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+EVENT_ID_PATTERN = re.compile(r"^\d{1,20}-\d{1,20}$")
+STREAM_BLOCK_MS = 500  # also bounds how long a new subscription waits to apply
+STREAM_READ_COUNT = 500
+REPLAY_LIMIT = 500
+
+StreamCallback = Callable[[UUID, str, Dict[str, Any], str], Awaitable[None]]
+
+
+def is_event_id(value: str) -> bool:
+    return bool(EVENT_ID_PATTERN.match(value))
+
+
+def _id_key(event_id: str) -> Tuple[int, int]:
+    milliseconds, sequence = event_id.split("-")
+    return int(milliseconds), int(sequence)
+
+
+class StreamSubscriber(RedisSubscriber):
+    """Reads the streams of locally connected users with one blocking XREAD.
+
+    A socket that was just sent its replay passes the last replayed entry ID
+    as ``start``, so nothing added between the replay and the next read is
+    missed. If several sockets ask for the same key the earliest ID wins;
+    clients drop the entries they have already seen.
+    """
+
+    name = "stream subscriber"
+
+    def __init__(self):
+        super().__init__()
+        self._starts: Dict[str, str] = {}
+
+    def acquire(self, channel: str, start: Optional[str] = None) -> None:
+        if start is not None:
+            self.start_from(channel, start)
+        super().acquire(channel)
+
+    def start_from(self, channel: str, start: str) -> None:
+        """Read ``channel`` from after ``start`` (unless already further back)."""
+        pending = self._starts.get(channel)
+        if pending is None or _id_key(start) < _id_key(pending):
+            self._starts[channel] = start
+        self._changed()
+
+    async def _sync(self, client, positions: Dict[str, str]) -> None:
+        self._dirty = False
+        version = self._version
+        starts, self._starts = self._starts, {}
+        wanted = set(self._wanted)
+        for key in list(positions):
+            if key not in wanted:
+                del positions[key]
+        added = wanted - positions.keys()
+        if added - starts.keys():
+            # Start at Redis's own clock; app server clocks may be skewed
+            seconds, microseconds = await client.time()
+            now = f"{seconds * 1000 + microseconds // 1000}-0"
+            for key in added - starts.keys():
+                positions[key] = now
+        for key, start in starts.items():
+            if key in added or (key in positions and _id_key(start) < _id_key(positions[key])):
+                positions[key] = start
+        self._subscribed = set(positions)
+        self._mark_applied(version)
+
+    async def _listen(self, callback: StreamCallback, *_) -> None:
+        client = get_redis_client()
+        positions: Dict[str, str] = {}
+        self._subscribed = set()
+        self._dirty = True
+        try:
+            while True:
+                if self._dirty:
+                    await self._sync(client, positions)
+                if not positions:
+                    await asyncio.sleep(SUBSCRIBER_POLL_SECONDS)
+                    continue
+
+                response = await client.xread(
+                    positions, count=STREAM_READ_COUNT, block=STREAM_BLOCK_MS
+                )
+                for key, entries in response or []:
+                    for entry_id, fields in entries:
+                        if key in positions:
+                            positions[key] = entry_id
+                        try:
+                            await callback(
+                                UUID(fields["user_id"]),
+                                fields["event"],
+                                json.loads(fields["data"]),
+                                entry_id,
+                            )
+                        except Exception as e:
+                            logger.error(f"Error processing stream entry {entry_id}: {e}")
+        finally:
+            self._subscribed = set()
+            await client.aclose()
+
+
+async def replay_events(
+    user_id: UUID, last_event_id: Optional[str]
+) -> Tuple[List[Dict[str, Any]], bool, Optional[str]]:
+    """Events for ``user_id`` after ``last_event_id``, oldest first.
+
+    Returns ``(events, resync, latest_id)``. ``resync`` is True when the
+    stream no longer reaches back to ``last_event_id`` (or more than
+    ``REPLAY_LIMIT`` entries were missed), so the client should refetch its
+    list instead. ``latest_id`` is the newest entry ID, to resume from later.
+    """
+    key = user_stream(user_id)
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.xrevrange(key, count=1)
+        pipe.xrange(key, count=1)
+        pipe.xlen(key)
+        if last_event_id:
+            pipe.xrange(key, min=f"({last_event_id}", count=REPLAY_LIMIT)
+        results = await pipe.execute()
+
+    newest, oldest, length = results[0], results[1], results[2]
+    latest_id = newest[0][0] if newest else None
+    if not last_event_id:
+        return [], False, latest_id
+
+    entries = results[3]
+    trimmed = (
+        oldest
+        and _id_key(oldest[0][0]) > _id_key(last_event_id)
+        and length >= settings.notification_stream_maxlen
+    )
+    resync = bool(trimmed) or len(entries) >= REPLAY_LIMIT
+    events = [
+        {"id": entry_id, "event": fields["event"], "data": json.loads(fields["data"])}
+        for entry_id, fields in entries
+        # Bucketed streams carry other users' entries too
+        if fields.get("user_id") == str(user_id)
+    ]
+    return ([] if resync else events), resync, latest_id
@@ -1,65 +1,442 @@
 import asyncio
 import json
 import logging
-from typing import Dict, Optional, Set
+import re
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 
 from fastapi import WebSocket
 
+from app.core.config import settings
+from app.notifications.broadcast import (
+    ALL_TOPIC,
+    ChannelSubscriber,
+    role_topic,
+    topic_channel,
+    user_channel,
+    user_stream,
+    uses_streams,
+)
+from app.notifications.streams import StreamSubscriber
+
 logger = logging.getLogger(__name__)
 
+# Topics clients may subscribe to themselves; "all" and "role:*" are implicit
+CLIENT_TOPIC_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_.-]{0,63}$")
+MAX_CLIENT_TOPICS = 20
+
+
+# Events where only the latest queued copy matters (for the "coalesce" policy)
+COALESCED_EVENTS = {"notification_count", "heartbeat"}
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "try again later"; clients reconnect
+HEARTBEAT_TIMEOUT_CLOSE_CODE = 4002
+HEARTBEAT_MESSAGE = json.dumps({"event": "heartbeat", "data": {}})
+# Longest a new socket waits for its Redis subscriptions before its handshake
+SUBSCRIBE_WAIT_SECONDS = 2.0
+
+
+def is_client_topic(topic: str) -> bool:
+    return topic != ALL_TOPIC and bool(CLIENT_TOPIC_PATTERN.match(topic))
+
+
+class Connection:
+    """
+    One WebSocket with its bounded outbound queue.
+
+    Senders only append to the queue; a writer task per connection does the
+    socket I/O, so a slow client delays nobody but itself. When the queue is
+    full, ``websocket_slow_consumer_policy`` decides: ``drop_oldest`` discards
+    the oldest queued message, ``coalesce`` first replaces an older copy of a
+    superseded event (e.g. an unread count) and otherwise drops the oldest,
+    and ``disconnect`` closes the socket so the client reconnects.
+
+    Slotted because there is one per open socket: ``last_seen`` is refreshed by
+    anything the client sends and drives the heartbeat reaper.
+    """
+
+    __slots__ = (
+        "websocket",
+        "user_id",
+        "queue",
+        "ready",
+        "writer",
+        "closing",
+        "close_code",
+        "connected_at",
+        "last_seen",
+        "bytes_sent",
+        "dropped",
+        "coalesced",
+    )
+
+    def __init__(self, websocket: WebSocket, user_id: UUID):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.closing = False
+        self.close_code = SLOW_CONSUMER_CLOSE_CODE
+        self.connected_at = time.time()
+        self.last_seen = self.connected_at
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def enqueue(
+        self, message: str, coalesce_key: Optional[str] = None, force: bool = False
+    ) -> bool:
+        """Queue a message. Returns False if the connection should be closed instead.
+
+        ``force`` skips the bound, for the server's own replies on this socket.
+        """
+        if self.closing:
+            return True
+        if not force and len(self.queue) >= settings.websocket_send_queue_size:
+            policy = settings.websocket_slow_consumer_policy
+            if policy == "disconnect":
+                return False
+            if not (policy == "coalesce" and self._drop_older_copy(coalesce_key)):
+                self.queue.popleft()
+                self.dropped += 1
+        self.queue.append((coalesce_key, message))
+        self.ready.set()
+        return True
+
+    def _drop_older_copy(self, coalesce_key: Optional[str]) -> bool:
+        if coalesce_key is None:
+            return False
+        for index, (key, _) in enumerate(self.queue):
+            if key == coalesce_key:
+                del self.queue[index]
+                self.coalesced += 1
+                return True
+        return False
+
 
 class ConnectionManager:
-    """Manages WebSocket connections per user."""
+    """Manages WebSocket connections per user and per topic."""
 
     def __init__(self):
         # user_id -> set of WebSocket connections (supports multiple tabs/devices)
         self._connections: Dict[UUID, Set[WebSocket]] = {}
+        # topic -> subscribed connections, and the reverse for cleanup
+        self._topics: Dict[str, Set[WebSocket]] = {}
+        self._socket_topics: Dict[WebSocket, Set[str]] = {}
+        self._records: Dict[WebSocket, Connection] = {}
+        # Totals carried over from closed connections
+        self._dropped = 0
+        self._coalesced = 0
+        self._slow_disconnects = 0
+        self._reaped = 0
+        self._bytes_sent = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Redis channels (and streams) follow local users and topics as they come and go
+        self._subscriber = ChannelSubscriber()
+        self._stream_subscriber = StreamSubscriber() if uses_streams() else None
         self._redis_task: Optional[asyncio.Task] = None
+        self._stream_task: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket, user_id: UUID) -> None:
-        """Accept and register a WebSocket connection."""
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: UUID,
+        role: Optional[str] = None,
+        stream_start: Optional[str] = None,
+        initial: Sequence[dict] = (),
+    ) -> None:
+        """Accept and register a WebSocket connection on its implicit topics.
+
+        ``initial`` messages (the handshake and any replay) are queued before
+        the socket can receive live deliveries, so they always arrive first.
+        Nothing is written until this instance's Redis subscriptions for the
+        socket are in effect (or ``SUBSCRIBE_WAIT_SECONDS`` have passed), so a
+        client that has seen the handshake is not missing live messages.
+
+        With the streams transport, ``stream_start`` is the last entry ID the
+        socket was replayed; live delivery continues right after it.
+        """
         await websocket.accept()
+        connection = Connection(websocket, user_id)
+        for data in initial:
+            connection.enqueue(json.dumps(data), force=True)
+        self._records[websocket] = connection
         if user_id not in self._connections:
             self._connections[user_id] = set()
+            self._watch_user(user_id, stream_start)
+        elif stream_start is not None and self._stream_subscriber is not None:
+            self._stream_subscriber.start_from(user_stream(user_id), stream_start)
         self._connections[user_id].add(websocket)
+        self._add_topic(websocket, ALL_TOPIC)
+        if role:
+            self._add_topic(websocket, role_topic(role))
+
+        subscribers = [self._subscriber]
+        if self._stream_subscriber is not None:
+            subscribers.append(self._stream_subscriber)
+        for subscriber in subscribers:
+            if not await subscriber.wait_applied(SUBSCRIBE_WAIT_SECONDS):
+                logger.warning(f"Redis {subscriber.name} not ready for user {user_id}")
+        if self._records.get(websocket) is not connection:
+            return  # closed while waiting
+        connection.writer = asyncio.create_task(self._write(connection))
         logger.info(
             f"WebSocket connected for user {user_id}. "
-            f"Active connections: {len(self._connections[user_id])}"
+            f"Active connections: {len(self._connections.get(user_id, ()))}"
         )
 
     def disconnect(self, websocket: WebSocket, user_id: UUID) -> None:
         """Remove a WebSocket connection."""
-        if user_id in self._connections:
-            self._connections[user_id].discard(websocket)
-            if not self._connections[user_id]:
-                del self._connections[user_id]
+        self._forget(websocket, user_id)
         logger.info(f"WebSocket disconnected for user {user_id}")
 
-    async def send_to_user(self, user_id: UUID, event: str, data: dict) -> None:
-        """Send a message to all connections of a specific user (local only)."""
-        if user_id not in self._connections:
-            logger.info(f"No local connections found for user {user_id}")
+    def _forget(self, websocket: WebSocket, user_id: UUID) -> None:
+        """Drop a socket from every index; safe to call more than once."""
+        connection = self._records.pop(websocket, None)
+        if connection is not None:
+            self._dropped += connection.dropped
+            self._coalesced += connection.coalesced
+            self._bytes_sent += connection.bytes_sent
+            if connection.writer not in (None, asyncio.current_task()):
+                connection.writer.cancel()
+        sockets = self._connections.get(user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._connections[user_id]
+                self._unwatch_user(user_id)
+        for topic in self._socket_topics.pop(websocket, set()):
+            self._remove_from_topic(websocket, topic)
+
+    def _watch_user(self, user_id: UUID, stream_start: Optional[str] = None) -> None:
+        if self._stream_subscriber is not None:
+            self._stream_subscriber.acquire(user_stream(user_id), stream_start)
+        else:
+            self._subscriber.acquire(user_channel(user_id))
+
+    def _unwatch_user(self, user_id: UUID) -> None:
+        if self._stream_subscriber is not None:
+            self._stream_subscriber.release(user_stream(user_id))
+        else:
+            self._subscriber.release(user_channel(user_id))
+
+    def _add_topic(self, websocket: WebSocket, topic: str) -> None:
+        if topic not in self._topics:
+            self._topics[topic] = set()
+            self._subscriber.acquire(topic_channel(topic))
+        self._topics[topic].add(websocket)
+        self._socket_topics.setdefault(websocket, set()).add(topic)
+
+    def _remove_from_topic(self, websocket: WebSocket, topic: str) -> None:
+        sockets = self._topics.get(topic)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._topics[topic]
+                self._subscriber.release(topic_channel(topic))
+
+    def subscribe(self, websocket: WebSocket, topic: str) -> bool:
+        """Subscribe a connection to a client topic. Returns False if not allowed."""
+        topics = self._socket_topics.get(websocket)
+        if topics is None or not is_client_topic(topic):
+            return False
+        client_topics = [t for t in topics if is_client_topic(t)]
+        if topic not in topics and len(client_topics) >= MAX_CLIENT_TOPICS:
+            return False
+        self._add_topic(websocket, topic)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, topic: str) -> bool:
+        """Drop a client topic subscription; implicit topics cannot be left."""
+        topics = self._socket_topics.get(websocket)
+        if topics is None or not is_client_topic(topic) or topic not in topics:
+            return False
+        topics.discard(topic)
+        self._remove_from_topic(websocket, topic)
+        return True
+
+    async def _write(self, connection: Connection) -> None:
+        """Drain one connection's queue onto its socket until it closes."""
+        websocket = connection.websocket
+        timeout = settings.websocket_send_timeout_seconds
+        try:
+            while True:
+                if not connection.queue:
+                    if connection.closing:
+                        break
+                    connection.ready.clear()
+                    await connection.ready.wait()
+                    continue
+                _, message = connection.queue.popleft()
+                await asyncio.wait_for(websocket.send_text(message), timeout)
+                # JSON is ASCII-encoded, so characters are bytes
+                connection.bytes_sent += len(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send to websocket for user {connection.user_id}: {e}")
+
+        code = connection.close_code if connection.closing else 1011
+        with suppress(Exception):
+            await asyncio.wait_for(websocket.close(code=code), timeout)
+        self._forget(websocket, connection.user_id)
+
+    @staticmethod
+    def _close(connection: Connection, code: int) -> None:
+        # The writer closes the socket once it sees ``closing``
+        connection.closing = True
+        connection.close_code = code
+        connection.queue.clear()
+        connection.ready.set()
+
+    def _deliver(self, websocket: WebSocket, message: str, event: str) -> None:
+        connection = self._records.get(websocket)
+        if connection is None:
             return
+        coalesce_key = event if event in COALESCED_EVENTS else None
+        if not connection.enqueue(message, coalesce_key):
+            logger.warning(f"Disconnecting slow WebSocket client for user {connection.user_id}")
+            self._close(connection, SLOW_CONSUMER_CLOSE_CODE)
+            self._slow_disconnects += 1
 
-        message = json.dumps({"event": event, "data": data})
-        dead_connections = set()
-        connection_count = len(self._connections[user_id])
-        logger.info(
-            f"Sending '{event}' to {connection_count} connection(s) for user {user_id}"
-        )
+    def touch(self, websocket: WebSocket) -> None:
+        """Record that the client sent something (any message counts as alive)."""
+        connection = self._records.get(websocket)
+        if connection is not None:
+            connection.last_seen = time.time()
 
-        for websocket in self._connections[user_id]:
+    def _heartbeat_once(self) -> int:
+        """Send a heartbeat to every socket and close those silent for too long."""
+        timeout = settings.websocket_heartbeat_timeout_seconds
+        now = time.time()
+        reaped = 0
+        for websocket, connection in list(self._records.items()):
+            if connection.closing:
+                continue
+            if timeout > 0 and now - connection.last_seen > timeout:
+                logger.info(f"Closing unresponsive WebSocket for user {connection.user_id}")
+                self._close(connection, HEARTBEAT_TIMEOUT_CLOSE_CODE)
+                reaped += 1
+                continue
+            self._deliver(websocket, HEARTBEAT_MESSAGE, "heartbeat")
+        self._reaped += reaped
+        return reaped
+
+    async def _heartbeat_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
             try:
-                await websocket.send_text(message)
-                logger.info(f"Message sent successfully to user {user_id}")
+                self._heartbeat_once()
             except Exception as e:
-                logger.warning(f"Failed to send to websocket: {e}")
-                dead_connections.add(websocket)
+                logger.error(f"WebSocket heartbeat failed: {e}")
 
-        # Clean up dead connections
-        for ws in dead_connections:
-            self._connections[user_id].discard(ws)
+    async def start_heartbeat(self) -> None:
+        """Start periodic heartbeats and the reaper for unresponsive sockets."""
+        interval = settings.websocket_heartbeat_interval_seconds
+        if interval <= 0 or self._heartbeat_task is not None:
+            return
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop(interval))
+        logger.info(f"Started WebSocket heartbeat every {interval}s")
+
+    async def stop_heartbeat(self) -> None:
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    async def send(self, websocket: WebSocket, data: dict) -> None:
+        """Queue a reply on one socket, in order with everything else sent to it."""
+        await self.send_text(websocket, json.dumps(data))
+
+    async def send_text(self, websocket: WebSocket, message: str) -> None:
+        connection = self._records.get(websocket)
+        if connection is not None:
+            connection.enqueue(message, force=True)
+
+    async def send_to_topic(self, topic: str, event: str, data: dict) -> None:
+        """Send a message to every local connection subscribed to ``topic``."""
+        sockets = self._topics.get(topic)
+        if not sockets:
+            return
+
+        message = json.dumps({"event": event, "data": data})
+        for websocket in list(sockets):
+            self._deliver(websocket, message, event)
+        logger.info(f"Queued '{event}' on topic {topic} for {len(sockets)} connection(s)")
+
+    async def send_to_user(
+        self, user_id: UUID, event: str, data: dict, event_id: Optional[str] = None
+    ) -> None:
+        """Send a message to all connections of a specific user (local only).
+
+        The message is queued on each connection and written by its writer
+        task, so this never waits on socket I/O. ``event_id`` is the stream
+        entry ID when the streams transport is on; clients keep the last one
+        to resume from after a reconnect.
+        """
+        if user_id not in self._connections:
+            logger.info(f"No local connections found for user {user_id}")
+            return
+
+        payload = {"event": event, "data": data}
+        if event_id is not None:
+            payload["id"] = event_id
+        message = json.dumps(payload)
+        sockets = list(self._connections[user_id])
+        logger.info(f"Queued '{event}' for {len(sockets)} connection(s) of user {user_id}")
+        for websocket in sockets:
+            self._deliver(websocket, message, event)
+
+    def stats(self) -> dict:
+        """Connection counts and outbound queue depths."""
+        records = list(self._records.values())
+        depths = [len(connection.queue) for connection in records]
+        queue_size = settings.websocket_send_queue_size
+        return {
+            "connections": len(records),
+            "users": len(self._connections),
+            "topics": len(self._topics),
+            "redis_channels": self._subscriber.channel_count(),
+            "redis_streams": (
+                self._stream_subscriber.channel_count() if self._stream_subscriber else 0
+            ),
+            "send_queue_size": queue_size,
+            "slow_consumer_policy": settings.websocket_slow_consumer_policy,
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "full_queues": sum(1 for depth in depths if depth >= queue_size),
+            "dropped_messages": self._dropped + sum(c.dropped for c in records),
+            "coalesced_messages": self._coalesced + sum(c.coalesced for c in records),
+            "slow_disconnects": self._slow_disconnects,
+            "heartbeat_interval_seconds": settings.websocket_heartbeat_interval_seconds,
+            "heartbeat_timeout_seconds": settings.websocket_heartbeat_timeout_seconds,
+            "reaped_connections": self._reaped,
+            "bytes_sent": self._bytes_sent + sum(c.bytes_sent for c in records),
+        }
+
+    def connection_stats(self, limit: int = 100) -> List[dict]:
+        """Per-connection records, least recently heard from first."""
+        now = time.time()
+        records = sorted(self._records.values(), key=lambda c: c.last_seen)[:limit]
+        return [
+            {
+                "user_id": str(connection.user_id),
+                "connected_seconds": round(now - connection.connected_at, 1),
+                "idle_seconds": round(now - connection.last_seen, 1),
+                "bytes_sent": connection.bytes_sent,
+                "queue_depth": len(connection.queue),
+                "dropped": connection.dropped,
+                "coalesced": connection.coalesced,
+                "topics": sorted(self._socket_topics.get(connection.websocket, ())),
+            }
+            for connection in records
+        ]
 
     def is_user_connected(self, user_id: UUID) -> bool:
         """Check if user has any active connections."""
@@ -71,28 +448,36 @@ class ConnectionManager:
 
     async def start_redis_listener(self) -> None:
         """Start listening to Redis pub/sub for notifications."""
-        from app.notifications.broadcast import subscribe_to_notifications
 
-        async def handle_redis_message(user_id: UUID, event: str, data: dict):
+        async def handle_redis_message(
+            user_id: UUID, event: str, data: dict, event_id: Optional[str] = None
+        ):
             """Handle incoming Redis messages and forward to WebSocket."""
             logger.info(f"Received Redis message: {event} for user {user_id}")
-            await self.send_to_user(user_id, event, data)
+            await self.send_to_user(user_id, event, data, event_id)
 
         self._redis_task = asyncio.create_task(
-            subscribe_to_notifications(handle_redis_message)
+            self._subscriber.run(handle_redis_message, self.send_to_topic)
         )
+        if self._stream_subscriber is not None:
+            self._stream_task = asyncio.create_task(
+                self._stream_subscriber.run(handle_redis_message)
+            )
         logger.info("Started Redis pub/sub listener for notifications")
 
     async def stop_redis_listener(self) -> None:
         """Stop the Redis listener."""
+        for task in (self._redis_task, self._stream_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         if self._redis_task:
-            self._redis_task.cancel()
-            try:
-                await self._redis_task
-            except asyncio.CancelledError:
-                pass
-            self._redis_task = None
             logger.info("Stopped Redis pub/sub listener")
+        self._redis_task = None
+        self._stream_task = None
 
 
 # Singleton instance
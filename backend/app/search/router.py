@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_current_user, get_db
-from app.models.user import User
+from app.core.dependencies import Principal, get_principal, get_read_db
 from app.search.schemas import SearchResponse
 from app.search.service import run_search
 
@@ -13,8 +12,8 @@ router = APIRouter()
 async def search(
     q: str = Query(..., min_length=1, max_length=200, description="Search query"),
     limit: int = Query(5, ge=1, le=20, description="Max results per provider"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_principal),
 ):
     """
     Global command-palette search endpoint.
@@ -18,18 +18,19 @@ from typing import Callable, Awaitable
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.dependencies import Principal
 from app.models.user import User
 from app.search.schemas import SearchGroup, SearchItem
 
 # Type alias for a search provider function
 SearchProvider = Callable[
-    [AsyncSession, User, str, int],
+    [AsyncSession, Principal, str, int],
     Awaitable[list[SearchItem]],
 ]
 
 
 async def _search_users(
-    db: AsyncSession, current_user: User, query: str, limit: int
+    db: AsyncSession, current_user: Principal, query: str, limit: int
 ) -> list[SearchItem]:
     """Search users by name, surname, email, or phone. Admin-only."""
     if current_user.role != "ADMIN":
@@ -74,7 +75,7 @@ PROVIDERS: list[tuple[str, SearchProvider]] = [
 
 async def run_search(
     db: AsyncSession,
-    current_user: User,
+    current_user: Principal,
     query: str,
     limit: int = 5,
 ) -> list[SearchGroup]:
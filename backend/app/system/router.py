@@ -0,0 +1,67 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
+
+from app.core.db_pool import pool_monitor
+from app.core.dependencies import Principal, require
+from app.core.hashing import password_hasher
+from app.core.http import outbound_http
+from app.core.principal_cache import principal_cache
+from app.core.slow_queries import slow_query_log
+from app.notifications.websocket import connection_manager
+
+router = APIRouter()
+
+
+@router.get("/hashing")
+async def hashing_stats(admin: Principal = Depends(require("system.manage"))):
+    """Password hashing pool usage and per-operation latency."""
+    return password_hasher.stats()
+
+
+@router.get("/principal-cache")
+async def principal_cache_stats(admin: Principal = Depends(require("system.manage"))):
+    """Authenticated user cache size and hit rate."""
+    return principal_cache.stats()
+
+
+@router.get("/outbound-http")
+async def outbound_http_stats(admin: Principal = Depends(require("system.manage"))):
+    """Per-provider timeouts and circuit breaker state."""
+    return outbound_http.stats()
+
+
+@router.get("/db-pool")
+async def db_pool_stats(admin: Principal = Depends(require("system.manage"))):
+    """Connection pool gauges, acquisition wait times and recent samples."""
+    return pool_monitor.stats()
+
+
+@router.get("/websockets")
+async def websocket_stats(admin: Principal = Depends(require("system.manage"))):
+    """Notification WebSocket connections, outbound queue depths and heartbeats."""
+    return connection_manager.stats()
+
+
+@router.get("/websockets/connections")
+async def websocket_connections(
+    limit: int = Query(100, ge=1, le=1000),
+    admin: Principal = Depends(require("system.manage")),
+):
+    """Per-connection records on this instance, least recently heard from first."""
+    return connection_manager.connection_stats(limit)
+
+
+@router.get("/slow-queries")
+async def slow_queries(
+    limit: Optional[int] = Query(None, ge=1),
+    admin: Principal = Depends(require("system.manage")),
+):
+    """Recently recorded slow statements with their EXPLAIN plans, newest first."""
+    return {**slow_query_log.stats(), "entries": slow_query_log.entries(limit)}
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(admin: Principal = Depends(require("system.manage"))):
+    """Empty the slow statement buffer."""
+    slow_query_log.clear()
@@ -43,3 +43,32 @@ def send_new_account_email(
     except Exception as exc:
         logger.error("Failed to send new account email to %s: %s", to_email, exc)
         raise self.retry(exc=exc)
+
+
+@celery_app.task(name="tasks.send_new_account_emails")
+def send_new_account_emails(accounts: list[dict], login_url: str) -> None:
+    """Send new account emails for a batch of accounts.
+
+    Each item holds ``to_email``, ``user_name``, ``password`` and ``role``.
+    Failed sends are handed to ``send_new_account_email`` to be retried
+    individually.
+    """
+    for account in accounts:
+        try:
+            subject, html_body = new_account_email(
+                account["user_name"],
+                account["to_email"],
+                account["password"],
+                account["role"],
+                login_url,
+            )
+            send_email(account["to_email"], subject, html_body)
+        except Exception as exc:
+            logger.error("Failed to send new account email to %s: %s", account["to_email"], exc)
+            send_new_account_email.delay(
+                account["to_email"],
+                account["user_name"],
+                account["password"],
+                account["role"],
+                login_url,
+            )
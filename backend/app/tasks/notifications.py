@@ -0,0 +1,45 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.celery import celery_app
+from app.database import create_worker_engine
+from app.notifications.partitions import maintain_partitions
+from app.notifications.service import reconcile_inbox_counts
+
+logger = logging.getLogger(__name__)
+
+
+async def _reconcile() -> int:
+    engine = create_worker_engine()
+    try:
+        session_factory = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        return await reconcile_inbox_counts(session_factory)
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(name="tasks.reconcile_notification_counts")
+def reconcile_notification_counts() -> int:
+    """Correct any drift between the inbox counters and the notifications table."""
+    corrected = asyncio.run(_reconcile())
+    if corrected:
+        logger.warning("Corrected notification counters for %s users", corrected)
+    return corrected
+
+
+async def _maintain() -> dict:
+    engine = create_worker_engine()
+    try:
+        return await maintain_partitions(engine)
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(name="tasks.maintain_notification_partitions")
+def maintain_notification_partitions() -> dict:
+    """Create upcoming monthly partitions and remove those past retention."""
+    return asyncio.run(_maintain())
@@ -2,13 +2,20 @@ import os
 import uuid as uuid_mod
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.service import verify_facebook_token, verify_google_token
+from app.auth.service import (
+    get_user_by_identity,
+    link_identity,
+    unlink_identity,
+    verify_facebook_token,
+    verify_google_token,
+)
 from app.core.config import settings
 from app.core.dependencies import get_current_user, get_db
-from app.core.security import hash_password, verify_password
+from app.core.hashing import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.writes import DuplicateError, commit_unique
 from app.models.user import User
 from app.users.schemas import (
     ChangePasswordRequest,
@@ -35,22 +42,18 @@ async def update_me(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    if data.phone_number and data.phone_number != current_user.phone_number:
-        existing = await db.execute(
-            select(User).where(User.phone_number == data.phone_number)
-        )
-        if existing.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Phone number already in use",
-            )
-
     update_data = data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(current_user, key, value)
 
-    await db.commit()
-    await db.refresh(current_user)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Phone number already in use",
+        )
+    await principal_cache.invalidate(current_user.id)
     return current_user
 
 
@@ -91,7 +94,7 @@ async def upload_avatar(
 
     current_user.avatar_url = f"/uploads/avatars/{filename}"
     await db.commit()
-    await db.refresh(current_user)
+    await principal_cache.invalidate(current_user.id)
     return current_user
 
 
@@ -101,14 +104,17 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    if not verify_password(data.current_password, current_user.password_hash):
+    if not await password_hasher.verify(
+        data.current_password, current_user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
 
-    current_user.password_hash = hash_password(data.new_password)
+    current_user.password_hash = await password_hasher.hash(data.new_password)
     await db.commit()
+    await principal_cache.invalidate(current_user.id)
     return {"detail": "Password changed successfully"}
 
 
@@ -119,7 +125,7 @@ async def connect_google(
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        id_info = verify_google_token(data.credential)
+        id_info = await verify_google_token(data.credential)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -130,21 +136,22 @@ async def connect_google(
         )
 
     # Ensure this Google ID is not already linked to a different account
-    result = await db.execute(
-        select(User).where(User.extra_data["google_id"].as_string() == google_id)
-    )
-    existing = result.scalar_one_or_none()
+    existing = await get_user_by_identity(db, "google", google_id)
     if existing and existing.id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This Google account is already linked to another user.",
         )
 
-    extra = dict(current_user.extra_data or {})
-    extra["google_id"] = google_id
-    current_user.extra_data = extra
-    await db.commit()
-    await db.refresh(current_user)
+    await link_identity(db, current_user, "google", google_id)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This Google account is already linked to another user.",
+        )
+    await principal_cache.invalidate(current_user.id)
     return current_user
 
 
@@ -153,11 +160,9 @@ async def disconnect_google(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    extra = dict(current_user.extra_data or {})
-    extra.pop("google_id", None)
-    current_user.extra_data = extra
+    await unlink_identity(db, current_user, "google")
     await db.commit()
-    await db.refresh(current_user)
+    await principal_cache.invalidate(current_user.id)
     return current_user
 
 
@@ -179,21 +184,22 @@ async def connect_facebook(
         )
 
     # Ensure this Facebook ID is not already linked to a different account
-    result = await db.execute(
-        select(User).where(User.extra_data["facebook_id"].as_string() == facebook_id)
-    )
-    existing = result.scalar_one_or_none()
+    existing = await get_user_by_identity(db, "facebook", facebook_id)
     if existing and existing.id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This Facebook account is already linked to another user.",
         )
 
-    extra = dict(current_user.extra_data or {})
-    extra["facebook_id"] = facebook_id
-    current_user.extra_data = extra
-    await db.commit()
-    await db.refresh(current_user)
+    await link_identity(db, current_user, "facebook", facebook_id)
+    try:
+        await commit_unique(db)
+    except DuplicateError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This Facebook account is already linked to another user.",
+        )
+    await principal_cache.invalidate(current_user.id)
     return current_user
 
 
@@ -202,10 +208,8 @@ async def disconnect_facebook(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    extra = dict(current_user.extra_data or {})
-    extra.pop("facebook_id", None)
-    current_user.extra_data = extra
+    await unlink_identity(db, current_user, "facebook")
     await db.commit()
-    await db.refresh(current_user)
+    await principal_cache.invalidate(current_user.id)
     return current_user
 
@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app.core.config import settings
 from app.models.base import Base
+from app.models.identity import UserIdentity  # noqa: F401
+from app.models.notification_inbox import NotificationInbox  # noqa: F401
 from app.models.user import User  # noqa: F401
 
 config = context.config
@@ -0,0 +1,72 @@
+"""create user_identities table and backfill from users.extra_data
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PROVIDERS = ("google", "facebook")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_identities",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("provider_user_id", sa.String(255), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_user_identities_provider_user_id",
+        "user_identities",
+        ["provider", "provider_user_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_user_identities_user_id_provider",
+        "user_identities",
+        ["user_id", "provider"],
+        unique=True,
+    )
+
+    # Backfill from extra_data. If two users claim the same social ID, the
+    # oldest account keeps it.
+    for provider in PROVIDERS:
+        op.execute(
+            f"""
+            INSERT INTO user_identities (id, user_id, provider, provider_user_id)
+            SELECT gen_random_uuid(), id, '{provider}', extra_data->>'{provider}_id'
+            FROM users
+            WHERE extra_data->>'{provider}_id' IS NOT NULL
+            ORDER BY created_at
+            ON CONFLICT DO NOTHING
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_identities_user_id_provider", table_name="user_identities")
+    op.drop_index("ix_user_identities_provider_user_id", table_name="user_identities")
+    op.drop_table("user_identities")
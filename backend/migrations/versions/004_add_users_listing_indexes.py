@@ -0,0 +1,34 @@
+"""add users indexes for keyset pagination and prefix filters
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"])
+    op.create_index("ix_users_role_created_at_id", "users", ["role", "created_at", "id"])
+    # text_pattern_ops lets LIKE 'prefix%' use the index under any collation
+    op.execute(
+        "CREATE INDEX ix_users_lower_email_pattern ON users (lower(email) text_pattern_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_users_lower_name_pattern ON users (lower(name) text_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_lower_name_pattern", table_name="users")
+    op.drop_index("ix_users_lower_email_pattern", table_name="users")
+    op.drop_index("ix_users_role_created_at_id", table_name="users")
+    op.drop_index("ix_users_created_at_id", table_name="users")
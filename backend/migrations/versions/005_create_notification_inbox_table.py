@@ -0,0 +1,49 @@
+"""create notification_inbox counters and backfill from notifications
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_inbox",
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        INSERT INTO notification_inbox (user_id, unread_count, total_count)
+        SELECT user_id, count(*) FILTER (WHERE NOT is_read), count(*)
+        FROM notifications
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_inbox")
@@ -0,0 +1,42 @@
+"""add notification feed indexes for keyset pagination
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_notifications_user_id_created_at_id",
+        "notifications",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_notifications_user_id_unread",
+        "notifications",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("NOT is_read"),
+    )
+    # Both are covered by the indexes above
+    op.drop_index("ix_notifications_user_id_is_read", table_name="notifications")
+    op.drop_index("ix_notifications_user_id", table_name="notifications")
+
+
+def downgrade() -> None:
+    op.create_index("ix_notifications_user_id", "notifications", ["user_id"])
+    op.create_index(
+        "ix_notifications_user_id_is_read", "notifications", ["user_id", "is_read"]
+    )
+    op.drop_index("ix_notifications_user_id_unread", table_name="notifications")
+    op.drop_index("ix_notifications_user_id_created_at_id", table_name="notifications")
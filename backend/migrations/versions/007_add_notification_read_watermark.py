@@ -0,0 +1,45 @@
+"""add read watermark to notification_inbox
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notification_inbox",
+        sa.Column("read_through_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "notification_inbox",
+        sa.Column("read_through_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    # Materialise the watermark into is_read so no notification becomes unread again
+    op.execute(
+        """
+        UPDATE notifications n
+        SET is_read = true, read_at = coalesce(n.read_at, now())
+        FROM notification_inbox i
+        WHERE n.user_id = i.user_id
+          AND NOT n.is_read
+          AND i.read_through_at IS NOT NULL
+          AND (n.created_at, n.id) <= (i.read_through_at, i.read_through_id)
+        """
+    )
+    op.drop_column("notification_inbox", "read_through_id")
+    op.drop_column("notification_inbox", "read_through_at")
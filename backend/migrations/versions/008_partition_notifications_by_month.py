@@ -0,0 +1,116 @@
+"""partition notifications by month on created_at
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = "id, user_id, type, title, message, link, is_read, extra_data, created_at, read_at"
+TABLE_BODY = """
+    id UUID NOT NULL,
+    user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    type VARCHAR(50) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    message TEXT,
+    link VARCHAR(500),
+    is_read BOOLEAN NOT NULL DEFAULT false,
+    extra_data JSON,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    read_at TIMESTAMP WITH TIME ZONE,
+"""
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _drop_indexes() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_id_created_at_id")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_id_unread")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_created_at")
+
+
+def _create_indexes() -> None:
+    op.execute(
+        "CREATE INDEX ix_notifications_user_id_created_at_id "
+        "ON notifications (user_id, created_at DESC, id DESC)"
+    )
+    op.execute(
+        "CREATE INDEX ix_notifications_user_id_unread "
+        "ON notifications (user_id, created_at DESC, id DESC) WHERE NOT is_read"
+    )
+
+
+def upgrade() -> None:
+    _drop_indexes()
+    op.execute("ALTER TABLE notifications RENAME TO notifications_legacy")
+    op.execute(
+        "ALTER TABLE notifications_legacy "
+        "RENAME CONSTRAINT notifications_pkey TO notifications_legacy_pkey"
+    )
+    # Unique constraints on a partitioned table must include the partition key
+    op.execute(
+        f"""
+        CREATE TABLE notifications ({TABLE_BODY}
+            CONSTRAINT notifications_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT")
+
+    # One partition per month from the oldest row up to a few months ahead
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM notifications_legacy"))
+    now = datetime.now(timezone.utc)
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE notifications_p{month:%Y%m} PARTITION OF notifications "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{following} 00:00:00+00')"
+        )
+        month = following
+
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_legacy"
+    )
+    op.execute("DROP TABLE notifications_legacy")
+    # Built after the copy, which is much faster than maintaining them row by row
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _drop_indexes()
+    op.execute("ALTER TABLE notifications RENAME TO notifications_partitioned")
+    op.execute(
+        "ALTER TABLE notifications_partitioned "
+        "RENAME CONSTRAINT notifications_pkey TO notifications_partitioned_pkey"
+    )
+    op.execute(
+        f"""
+        CREATE TABLE notifications ({TABLE_BODY}
+            CONSTRAINT notifications_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM notifications_partitioned"
+    )
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE notifications_partitioned")
+    _create_indexes()
+    op.execute("CREATE INDEX ix_notifications_created_at ON notifications (created_at)")
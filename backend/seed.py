@@ -4,7 +4,7 @@ import asyncio
 
 from sqlalchemy import select
 
-from app.core.security import hash_password
+from app.core.hashing import password_hasher
 from app.database import async_session
 from app.models.user import User
 
@@ -35,7 +35,7 @@ async def seed():
             email=ADMIN_USER["email"],
             phone_number=ADMIN_USER["phone_number"],
             role=ADMIN_USER["role"],
-            password_hash=hash_password(ADMIN_USER["password"]),
+            password_hash=await password_hasher.hash(ADMIN_USER["password"]),
         )
         db.add(user)
         await db.commit()
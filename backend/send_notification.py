@@ -5,6 +5,10 @@ Usage:
     python send_notification.py --user-id <uuid> --type info --title "Hello" --message "World"
     python send_notification.py --email iqbaleff214@gmail.com --type success --title "Task Complete"
     python send_notification.py --all --type warning --title "System Maintenance"
+    python send_notification.py --role STAFF --title "Staff meeting at 3pm"
+    python send_notification.py --user-ids <uuid>,<uuid> --title "Hello"
+
+--all, --role and --user-ids use the batched fan-out engine and report progress.
 """
 
 import argparse
@@ -19,7 +23,12 @@ from app.database import async_session
 from app.models.notification import Notification  # noqa: F401 - needed for model registry
 from app.models.user import User
 from app.notifications.broadcast import publish_notification
-from app.notifications.schemas import NotificationCreate, NotificationResponse
+from app.notifications.fanout import fan_out
+from app.notifications.schemas import (
+    NotificationContent,
+    NotificationCreate,
+    NotificationResponse,
+)
 from app.notifications.service import create_notification
 
 
@@ -28,9 +37,16 @@ async def get_user_by_email(db, email: str) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
-async def get_all_user_ids(db) -> List[UUID]:
-    result = await db.execute(select(User.id))
-    return [row[0] for row in result.fetchall()]
+def parse_user_ids(value: str) -> List[UUID]:
+    try:
+        return [UUID(part.strip()) for part in value.split(",") if part.strip()]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Invalid UUID list: {e}")
+
+
+async def print_progress(processed: int, total: int, elapsed: float) -> None:
+    rate = processed / elapsed if elapsed > 0 else 0
+    print(f"\r  {processed}/{total} sent ({rate:.0f}/s)", end="", flush=True)
 
 
 async def send_and_notify(
@@ -74,6 +90,12 @@ async def main():
     target_group.add_argument("--user-id", type=str, help="Target user UUID")
     target_group.add_argument("--email", type=str, help="Target user email")
     target_group.add_argument("--all", action="store_true", help="Send to all users")
+    target_group.add_argument(
+        "--role", choices=["ADMIN", "STAFF", "USER"], help="Send to every user with this role"
+    )
+    target_group.add_argument(
+        "--user-ids", type=parse_user_ids, help="Comma-separated target user UUIDs"
+    )
 
     # Notification content
     parser.add_argument(
@@ -85,9 +107,33 @@ async def main():
     parser.add_argument("--title", required=True, help="Notification title")
     parser.add_argument("--message", help="Notification message body")
     parser.add_argument("--link", help="Optional action URL")
+    parser.add_argument(
+        "--batch-size", type=int, help="Rows per batch for --all, --role and --user-ids"
+    )
 
     args = parser.parse_args()
 
+    if args.all or args.role or args.user_ids:
+        content = NotificationContent(
+            type=args.type, title=args.title, message=args.message, link=args.link
+        )
+        print("Broadcasting notification...")
+        result = await fan_out(
+            content,
+            role=args.role,
+            user_ids=args.user_ids,
+            batch_size=args.batch_size,
+            on_progress=print_progress,
+        )
+        if not result["sent"]:
+            print("Error: No matching users found in database", file=sys.stderr)
+            sys.exit(1)
+        print(
+            f"\nDone! Sent {result['sent']} notification(s) "
+            f"in {result['elapsed_seconds']:.1f}s ({result['rate']:.0f}/s)."
+        )
+        return
+
     async with async_session() as db:
         user_ids: list[UUID] = []
 
@@ -97,17 +143,12 @@ async def main():
             except ValueError:
                 print(f"Error: Invalid UUID: {args.user_id}", file=sys.stderr)
                 sys.exit(1)
-        elif args.email:
+        else:  # --email
             user = await get_user_by_email(db, args.email)
             if not user:
                 print(f"Error: User not found with email: {args.email}", file=sys.stderr)
                 sys.exit(1)
             user_ids = [user.id]
-        else:  # --all
-            user_ids = await get_all_user_ids(db)
-            if not user_ids:
-                print("Error: No users found in database", file=sys.stderr)
-                sys.exit(1)
 
     print(f"Sending notification to {len(user_ids)} user(s)...")
 
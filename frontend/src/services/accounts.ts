@@ -10,9 +10,35 @@ export interface CreateAccountPayload {
   role: "ADMIN" | "STAFF" | "USER"
 }
 
+export interface AccountFilters {
+  role?: "ADMIN" | "STAFF" | "USER"
+  created_from?: string
+  created_to?: string
+  q?: string
+}
+
+export interface AccountPage {
+  items: User[]
+  next_cursor: string | null
+}
+
 export const accountsService = {
-  async list(): Promise<User[]> {
-    const { data } = await api.get<User[]>("/accounts/")
+  async list(filters: AccountFilters = {}, cursor?: string | null, limit = 25): Promise<AccountPage> {
+    const params: Record<string, string | number> = { limit }
+    for (const [key, value] of Object.entries(filters)) {
+      if (value) params[key] = value
+    }
+    if (cursor) params.cursor = cursor
+    const { data } = await api.get<AccountPage>("/accounts/", { params })
+    return data
+  },
+
+  async export(filters: AccountFilters = {}, format: "csv" | "ndjson" = "csv"): Promise<Blob> {
+    const params: Record<string, string> = { format }
+    for (const [key, value] of Object.entries(filters)) {
+      if (value) params[key] = value
+    }
+    const { data } = await api.get<Blob>("/accounts/export", { params, responseType: "blob" })
     return data
   },
 
@@ -16,17 +16,30 @@ export interface NotificationListResponse {
   notifications: Notification[]
   unread_count: number
   total: number
+  next_cursor: string | null
 }
 
 export interface WebSocketMessage {
-  event: "connected" | "new_notification" | "notification_count" | "notification_read"
+  event:
+    | "connected"
+    | "new_notification"
+    | "notification_count"
+    | "notification_read"
+    | "broadcast"
+    | "subscribed"
+    | "unsubscribed"
+    | "error"
+    | "resync"
+    | "heartbeat"
   data: Record<string, unknown>
+  id?: string // stream entry ID, present when the server uses Redis Streams
 }
 
 export const notificationService = {
   async getNotifications(params?: {
     limit?: number
     offset?: number
+    before?: string
     unread_only?: boolean
   }): Promise<NotificationListResponse> {
     const { data } = await api.get<NotificationListResponse>("/notifications/", {
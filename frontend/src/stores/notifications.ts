@@ -11,12 +11,17 @@ export const useNotificationStore = defineStore("notifications", () => {
   const notifications = ref<Notification[]>([])
   const unreadCount = ref(0)
   const total = ref(0)
+  const nextCursor = ref<string | null>(null)
   const isLoading = ref(false)
   const isConnected = ref(false)
   const error = ref<string | null>(null)
   const soundEnabled = ref(true)
 
   let websocket: WebSocket | null = null
+  // Topics beyond the implicit "all" and "role:<ROLE>", restored on reconnect
+  const topics = new Set<string>()
+  // Last stream entry seen, so a reconnect can replay what was missed
+  let lastEventId: string | null = null
   let reconnectTimeout: ReturnType<typeof setTimeout> | null = null
   let pingInterval: ReturnType<typeof setInterval> | null = null
   let notificationSound: HTMLAudioElement | null = null
@@ -97,6 +102,7 @@ export const useNotificationStore = defineStore("notifications", () => {
       notifications.value = response.notifications
       unreadCount.value = response.unread_count
       total.value = response.total
+      nextCursor.value = response.next_cursor
     } catch (e) {
       error.value = "Failed to load notifications"
       console.error("Failed to fetch notifications:", e)
@@ -105,6 +111,25 @@ export const useNotificationStore = defineStore("notifications", () => {
     }
   }
 
+  async function loadMore(limit = 20) {
+    if (!nextCursor.value || isLoading.value) return
+    isLoading.value = true
+    try {
+      const response = await notificationService.getNotifications({
+        limit,
+        before: nextCursor.value,
+      })
+      notifications.value.push(...response.notifications)
+      unreadCount.value = response.unread_count
+      total.value = response.total
+      nextCursor.value = response.next_cursor
+    } catch (e) {
+      console.error("Failed to load more notifications:", e)
+    } finally {
+      isLoading.value = false
+    }
+  }
+
   async function fetchUnreadCount() {
     try {
       const response = await notificationService.getUnreadCount()
@@ -155,7 +180,8 @@ export const useNotificationStore = defineStore("notifications", () => {
 
     const apiUrl = import.meta.env.VITE_APP_API_URL || "http://localhost:8001"
     const wsUrl = apiUrl.replace("http", "ws")
-    const url = `${wsUrl}/notifications/ws?token=${token}`
+    let url = `${wsUrl}/notifications/ws?token=${token}`
+    if (lastEventId) url += `&last_event_id=${encodeURIComponent(lastEventId)}`
 
     try {
       websocket = new WebSocket(url)
@@ -163,6 +189,7 @@ export const useNotificationStore = defineStore("notifications", () => {
       websocket.onopen = () => {
         console.log("WebSocket connected")
         isConnected.value = true
+        topics.forEach((topic) => sendTopicAction("subscribe", topic))
 
         // Start ping interval to keep connection alive
         pingInterval = setInterval(() => {
@@ -177,6 +204,11 @@ export const useNotificationStore = defineStore("notifications", () => {
 
         try {
           const message: WebSocketMessage = JSON.parse(event.data)
+          if (message.event === "heartbeat") {
+            // The server closes sockets that stop answering its heartbeats
+            websocket?.send("pong")
+            return
+          }
           handleWebSocketMessage(message)
         } catch (e) {
           console.error("Failed to parse WebSocket message:", e)
@@ -203,15 +235,40 @@ export const useNotificationStore = defineStore("notifications", () => {
     }
   }
 
+  // Stream entry IDs are "<milliseconds>-<sequence>"
+  function compareEventIds(a: string, b: string): number {
+    const [aMs, aSeq] = a.split("-").map(Number)
+    const [bMs, bSeq] = b.split("-").map(Number)
+    return aMs - bMs || aSeq - bSeq
+  }
+
   function handleWebSocketMessage(message: WebSocketMessage) {
     console.log("WebSocket message received:", message.event, message.data)
 
+    if (message.id) {
+      // Replayed and live delivery can overlap after a reconnect
+      if (lastEventId && compareEventIds(message.id, lastEventId) <= 0) return
+      lastEventId = message.id
+    }
+
     switch (message.event) {
       case "connected":
-        unreadCount.value = (message.data.unread_count as number) || 0
+        // A resumed session gets its count in a notification_count event after the replay
+        if (typeof message.data.unread_count === "number") {
+          unreadCount.value = message.data.unread_count
+        }
+        if (!lastEventId && message.data.last_event_id) {
+          lastEventId = message.data.last_event_id as string
+        }
         console.log("WebSocket connected, unread count:", unreadCount.value)
         break
 
+      case "resync":
+        // Too much was missed to replay; start again from the server's state
+        lastEventId = (message.data.last_event_id as string) || null
+        fetchNotifications({ limit: 10 })
+        break
+
       case "new_notification": {
         // Add new notification to the top of the list
         const newNotification = message.data as unknown as Notification
@@ -228,6 +285,25 @@ export const useNotificationStore = defineStore("notifications", () => {
         unreadCount.value = (message.data.unread_count as number) || 0
         break
 
+      case "broadcast": {
+        // One message for a whole topic; a stored copy has its own ID per user,
+        // so it is counted now and listed on the next fetch
+        const broadcastNotification = message.data.notification as unknown as Notification
+        if (message.data.persisted) {
+          unreadCount.value++
+          total.value++
+        } else {
+          notifications.value = [broadcastNotification, ...notifications.value]
+        }
+        playNotificationSound()
+        break
+      }
+
+      case "error":
+        console.warn("WebSocket error message:", message.data.detail)
+        if (message.data.topic) topics.delete(message.data.topic as string)
+        break
+
       case "notification_read": {
         // Update read status from another tab/device
         const readIds = (message.data.notification_ids as string[]) || []
@@ -239,6 +315,22 @@ export const useNotificationStore = defineStore("notifications", () => {
     }
   }
 
+  function sendTopicAction(action: "subscribe" | "unsubscribe", topic: string) {
+    if (websocket?.readyState === WebSocket.OPEN) {
+      websocket.send(JSON.stringify({ action, topic }))
+    }
+  }
+
+  function subscribe(topic: string) {
+    topics.add(topic)
+    sendTopicAction("subscribe", topic)
+  }
+
+  function unsubscribe(topic: string) {
+    topics.delete(topic)
+    sendTopicAction("unsubscribe", topic)
+  }
+
   function scheduleReconnect() {
     if (reconnectTimeout) return
     reconnectTimeout = setTimeout(() => {
@@ -276,7 +368,10 @@ export const useNotificationStore = defineStore("notifications", () => {
     notifications.value = []
     unreadCount.value = 0
     total.value = 0
+    nextCursor.value = null
     error.value = null
+    topics.clear()
+    lastEventId = null
   }
 
   return {
@@ -284,6 +379,7 @@ export const useNotificationStore = defineStore("notifications", () => {
     notifications,
     unreadCount,
     total,
+    nextCursor,
     isLoading,
     isConnected,
     error,
@@ -293,11 +389,14 @@ export const useNotificationStore = defineStore("notifications", () => {
     displayCount,
     // Actions
     fetchNotifications,
+    loadMore,
     fetchUnreadCount,
     markAsRead,
     markAllAsRead,
     connectWebSocket,
     disconnectWebSocket,
+    subscribe,
+    unsubscribe,
     reset,
     toggleSound,
   }